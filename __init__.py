@@ -3,3 +3,4 @@ from .ga.individual import *
 from .ga.obj_functs import *
 from .ga.penalty_fcts import *
 from .ga.pp_ga import *
+from .ga.termination import *
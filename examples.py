@@ -67,22 +67,14 @@ def scenario1ref():
 
 def scenario2(save=False, plot=False):
     """ Test OPF with larger network (cigre mv with pv and wind).
-    Demonstrates the usage of tap-changable transformer and how considered
-    constraints can be chosen as a tuple of strings. """
+    Demonstrates the usage of tap-changable transformer, how multiple
+    variables can be chosen at once and how considered constraints can be
+    chosen as a tuple of strings. """
     net = create_net2()
 
     # Degrees of freedom for optimization
-    variables = (('sgen', 'q_mvar', 0),
-                 ('sgen', 'q_mvar', 1),
-                 ('sgen', 'q_mvar', 2),
-                 ('sgen', 'q_mvar', 3),
-                 ('sgen', 'q_mvar', 4),
-                 ('sgen', 'q_mvar', 5),
-                 ('sgen', 'q_mvar', 6),
-                 ('sgen', 'q_mvar', 7),
-                 ('sgen', 'q_mvar', 8),
-                 ('trafo', 'tap_pos', 0),
-                 ('trafo', 'tap_pos', 1))
+    variables = (('sgen', 'q_mvar', 'all'),
+                 ('trafo', 'tap_pos', (0, 1)))
 
     constraints = ('voltage_band', 'line_load', 'trafo_load', 'trafo3w_load')
     ga = pp_ga.GeneticAlgorithm(pop_size=150, variables=variables,
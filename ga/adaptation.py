@@ -0,0 +1,83 @@
+# adaptation.py
+"""
+Self-adaptive control of the mutation for the pandapower ga-OPF: The
+mutation rate and the probabilities of the mutation operators get adjusted
+during the run based on the success of the mutated individuals, so that
+they do not have to be tuned by hand for every grid.
+
+A child counts as success if its fitness is better than the median
+fitness of the previous generation.
+
+"""
+
+import numpy as np
+
+
+class Mixin:
+    def adapt_mutation(self, factor: float=1.2, learning_rate: float=0.3,
+                       min_rate: float=0.001, max_rate: float=0.5,
+                       min_prob: float=0.05):
+        """ Adjust mutation rate and operator probabilities after the
+        evaluation of a new generation.
+
+        Mutation rate: Increased by 'factor' if mutated children are more
+        successful than unmutated ones, otherwise decreased.
+
+        Operator probabilities: Moved by 'learning_rate' towards the
+        relative success rates of the operators (every operator keeps at
+        least 'min_prob' to stay explorable). """
+        fitness = np.array([ind.fitness for ind in self.pop])
+        reference = self.reference_fitness
+        self.reference_fitness = float(np.median(fitness))
+        if reference is None:
+            # First generation: Nothing to compare with
+            return
+
+        success = fitness < reference
+        mutated = np.array([bool(getattr(ind, 'mut_operators', None))
+                            for ind in self.pop])
+        rate_mutated = success[mutated].mean() if mutated.any() else 0.0
+        rate_unmutated = (success[~mutated].mean() if (~mutated).any()
+                          else 0.0)
+
+        # Success-based adjustment of the mutation rate
+        if rate_mutated > rate_unmutated:
+            self.mutation_rate *= factor
+        else:
+            self.mutation_rate /= factor
+        self.mutation_rate = min(max(self.mutation_rate, min_rate), max_rate)
+
+        # Credit assignment to the mutation operators
+        uses = dict.fromkeys(self.mut_operators, 0)
+        successes = dict.fromkeys(self.mut_operators, 0)
+        for ind, succ in zip(self.pop, success):
+            for mut_operator in getattr(ind, 'mut_operators', ()):
+                uses[mut_operator] += 1
+                successes[mut_operator] += succ
+        if sum(uses.values()) > 0:
+            # Laplace smoothing for rarely used operators
+            credits = {op: (successes[op] + 1) / (uses[op] + 2)
+                       for op in self.mut_operators}
+            total_credit = sum(credits.values())
+            for op in self.mut_operators:
+                self.mut_operators[op] = float(
+                    (1 - learning_rate) * self.mut_operators[op]
+                    + learning_rate * credits[op] / total_credit)
+            self.normalize_mut_operators(min_prob)
+
+        self.adaptation_stats.append({
+            'n_iter': self.n_iter,
+            'mutation_rate': self.mutation_rate,
+            'mut_operators': dict(self.mut_operators),
+            'success_mutated': float(rate_mutated),
+            'success_unmutated': float(rate_unmutated)})
+
+    def normalize_mut_operators(self, min_prob: float):
+        """ Make operator probabilities sum up to one with a lower limit. """
+        total = sum(self.mut_operators.values())
+        for op in self.mut_operators:
+            self.mut_operators[op] = max(self.mut_operators[op] / total,
+                                         min_prob)
+        total = sum(self.mut_operators.values())
+        for op in self.mut_operators:
+            self.mut_operators[op] /= total
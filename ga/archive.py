@@ -0,0 +1,150 @@
+# archive.py
+"""
+A persistent archive of elite solutions across optimization runs, to
+warm-start the initial population of new runs on the same grid.
+
+Solutions are stored per network fingerprint (topology + variable set) and
+indexed by the operating conditions (loads, generation) of the respective
+run, so that the solutions of the most similar situations can be found by
+nearest-neighbour lookup.
+
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+# Columns that define the topology of the respective element
+TOPOLOGY = {'bus': ('vn_kv', ),
+            'line': ('from_bus', 'to_bus', 'length_km', 'r_ohm_per_km',
+                     'x_ohm_per_km'),
+            'trafo': ('hv_bus', 'lv_bus', 'sn_mva'),
+            'trafo3w': ('hv_bus', 'mv_bus', 'lv_bus', 'sn_hv_mva'),
+            'ext_grid': ('bus', ),
+            'gen': ('bus', ),
+            'sgen': ('bus', ),
+            'load': ('bus', ),
+            'storage': ('bus', ),
+            'shunt': ('bus', )}
+
+# Columns that define the operating conditions
+CONDITIONS = (('load', 'p_mw'), ('load', 'q_mvar'), ('sgen', 'p_mw'),
+              ('storage', 'p_mw'), ('ext_grid', 'vm_pu'))
+
+
+class SolutionArchive:
+    def __init__(self, path: str, max_entries: int=1000):
+        """ path: json file of the archive (gets created if not existing).
+
+        max_entries: Max number of solutions per fingerprint. The oldest
+        ones are removed first. """
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = {}
+        if os.path.isfile(path):
+            with open(path) as file:
+                self.entries = json.load(file)
+        # Nearest-neighbour index per fingerprint (built on demand)
+        self.trees = {}
+
+    def add(self, net_key: str, conditions, genes, fitness):
+        """ Add solutions (gene vectors with their fitness values) that
+        were found for the given operating conditions. """
+        entry = self.entries.setdefault(
+            net_key, {'conditions': [], 'genes': [], 'fitness': []})
+        conditions = [float(c) for c in conditions]
+        for gene_vector, fit in zip(genes, fitness):
+            gene_vector = [float(g) for g in gene_vector]
+            duplicate = self.find(entry, conditions, gene_vector)
+            if duplicate is not None:
+                # Already stored (e.g. a surviving seed of a warm start)
+                entry['fitness'][duplicate] = min(
+                    entry['fitness'][duplicate], float(fit))
+                continue
+            entry['conditions'].append(conditions)
+            entry['genes'].append(gene_vector)
+            entry['fitness'].append(float(fit))
+        for values in entry.values():
+            del values[:-self.max_entries]
+        self.trees.pop(net_key, None)
+
+    @staticmethod
+    def find(entry, conditions, gene_vector):
+        """ Position of a (near-)identical solution for (near-)identical
+        conditions in an entry or None. """
+        if not entry['genes']:
+            return None
+        same = (np.isclose(entry['conditions'], conditions).all(axis=1)
+                & np.isclose(entry['genes'], gene_vector).all(axis=1))
+        matches = np.flatnonzero(same)
+        return int(matches[0]) if len(matches) else None
+
+    def nearest(self, net_key: str, conditions, n: int):
+        """ Return up to n gene vectors that were found for the most similar
+        operating conditions (best fitness first for equal distance). """
+        entry = self.entries.get(net_key)
+        if n <= 0 or not entry or not entry['genes']:
+            return []
+
+        if net_key not in self.trees:
+            from scipy.spatial import cKDTree
+            self.trees[net_key] = cKDTree(np.array(entry['conditions']))
+        tree = self.trees[net_key]
+
+        conditions = np.asarray(conditions, dtype=float)
+        n = min(n, len(entry['genes']))
+        dists, _ = tree.query(conditions, k=n)
+        # All candidates up to the n-th distance, to sort ties explicitly
+        radius = np.atleast_1d(dists)[-1] * (1 + 1e-9) + 1e-12
+        idxs = np.array(tree.query_ball_point(conditions, radius), dtype=int)
+        dists = np.linalg.norm(tree.data[idxs] - conditions, axis=1)
+        fitness = np.array(entry['fitness'])[idxs]
+        order = np.lexsort((fitness, dists))[:n]
+        return [entry['genes'][idx] for idx in idxs[order]]
+
+    def save(self):
+        """ Write archive to disk. A temporary file gets replaced
+        atomically, so that a crash while writing never corrupts the
+        archive. """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(dir=directory or '.',
+                                            suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as file:
+                json.dump(self.entries, file)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def fingerprint(net, variables):
+    """ Hash of the network topology and the optimized variables. Runs with
+    the same fingerprint can share solutions. """
+    data = [[list(var) for var in variables]]
+    for element, columns in TOPOLOGY.items():
+        if element not in net or len(net[element].index) == 0:
+            continue
+        data.append([element, [int(idx) for idx in net[element].index]])
+        for column in columns:
+            if column in net[element]:
+                data.append(net[element][column].astype(float).round(6)
+                            .tolist())
+    raw = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+def operating_conditions(net):
+    """ Vector of the operating conditions of a net (loads, generation,
+    voltage set-points of the external grid). """
+    conditions = []
+    for element, column in CONDITIONS:
+        if element in net and column in net[element]:
+            conditions.extend(net[element][column].astype(float).tolist())
+    return np.array(conditions)
@@ -0,0 +1,232 @@
+# contingency.py
+"""
+Security-constrained (N-1) evaluation for the pandapower ga-OPF.
+
+Checking every outage with an AC power flow for every individual would
+multiply the number of power flows by the number of branches. Instead, the
+outages are screened with line outage distribution factors (LODF) of the
+DC power flow model first, which needs only a few matrix operations per
+individual. Only critical outages get checked with AC power flows. Outages
+that led to violations stay active (cached) for some generations, because
+the linear screening can miss them.
+
+"""
+
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from copy import deepcopy
+
+import numpy as np
+
+from .penalty_fcts import penalty_fct
+
+
+class ContingencyScreen:
+    def __init__(self, elements: tuple=('line', 'trafo'),
+                 constraints: tuple=('voltage_band', 'line_load',
+                                     'trafo_load'),
+                 threshold: float=0.9, keep_active: int=5,
+                 failure_costs: float=1000000, n_workers: int=1):
+        """ elements: Branch types whose outages are considered.
+
+        constraints: Post-PF constraints to check after an outage (see
+        "penalty_fcts.py").
+
+        threshold: Outages are critical if the estimated loading of any
+        other branch exceeds 'threshold' times its max loading.
+
+        keep_active: Number of generations an outage stays in the active
+        set after it caused a violation the last time.
+
+        failure_costs: Penalty if the power flow after an outage fails.
+
+        n_workers: Number of processes for the AC checks (1: serial). """
+        self.elements = elements
+        self.constraints = constraints
+        self.threshold = threshold
+        self.keep_active = keep_active
+        self.failure_costs = failure_costs
+        self.n_workers = n_workers
+
+        self.lodf = None
+        self.executor = None
+        self.futures = []
+        # Copy of the net for serial AC checks
+        self.net_copy = None
+        # Active outages: (element, idx) -> last generation with violation
+        self.active = {}
+        self.n_ac_checks = 0
+
+    def __call__(self, net, backend, n_iter: int=0, setpoints: tuple=()):
+        """ Return the total penalty of all critical outages for a net with
+        base case power flow results. 'setpoints' are the actuator values
+        of the evaluated individual as ((unit_type, actuator, idx), value),
+        so that the AC checks can work on a cached copy of the net (or in
+        the worker processes) without copying or sending the whole net. """
+        if self.lodf is None:
+            self.prepare(net)
+
+        # Forget outages that did not cause violations for a while
+        self.active = {outage: last for outage, last in self.active.items()
+                       if n_iter - last <= self.keep_active}
+        outages = set(self.screen(net)) | set(self.active)
+        if not outages:
+            return 0
+
+        outages = sorted(outages)
+        penalties = self.check(net, backend, outages, setpoints)
+        for outage, penalty in zip(outages, penalties):
+            if penalty > 0:
+                self.active[outage] = n_iter
+
+        return sum(penalties)
+
+    def prepare(self, net):
+        """ Calculate LODF matrix of the in-service branches once (the
+        topology does not change during optimization) and collect the
+        branch ratings. Outages that split the grid are not considered. """
+        from pandapower.pypower.makeLODF import makeLODF
+        from pandapower.pypower.makePTDF import makePTDF
+
+        ppci = net._ppc['internal']
+        ptdf = makePTDF(ppci['baseMVA'], ppci['bus'], ppci['branch'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lodf = makeLODF(ppci['branch'], ptdf)
+
+        # Map pandapower branches to rows of the internal branch matrix
+        in_service = net._ppc['internal']['branch_is']
+        ppci_rows = np.cumsum(in_service) - 1
+        self.branches = []
+        for element in ('line', 'trafo'):
+            if element not in net._pd2ppc_lookups['branch']:
+                continue
+            start, _ = net._pd2ppc_lookups['branch'][element]
+            for pos, idx in enumerate(net[element].index):
+                if in_service[start + pos]:
+                    self.branches.append(
+                        (element, idx, ppci_rows[start + pos]))
+
+        rows = [row for _, _, row in self.branches]
+        self.lodf = lodf[np.ix_(rows, rows)]
+        # Outages that split the grid have infinite/undefined factors
+        self.splitting = ~np.isfinite(self.lodf).all(axis=0)
+        with np.errstate(invalid='ignore'):
+            self.splitting |= (np.abs(self.lodf) > 1e3).any(axis=0)
+        # They are not screened, zero factors prevent overflows in 'screen'
+        self.lodf[:, self.splitting] = 0
+        self.lodf = np.nan_to_num(self.lodf)
+
+    def screen(self, net):
+        """ Estimate the post-outage loading of all branches for all
+        outages (linear) and return the critical outages. """
+        p_flow = []
+        q_flow = []
+        loading = []
+        max_loading = []
+        for element, idx, _ in self.branches:
+            side = 'from' if element == 'line' else 'hv'
+            res = net[f'res_{element}']
+            p_flow.append(res[f'p_{side}_mw'][idx])
+            q_flow.append(res[f'q_{side}_mvar'][idx])
+            loading.append(res.loading_percent[idx])
+            max_loading.append(net[element].max_loading_percent[idx])
+        p_flow, q_flow = np.array(p_flow), np.array(q_flow)
+        loading, max_loading = np.array(loading), np.array(max_loading)
+
+        # Rating derived from base case: apparent power at 100% loading
+        s_flow = np.sqrt(p_flow**2 + q_flow**2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rating = np.where(loading > 0, s_flow / loading * 100, np.inf)
+
+        # post_p[l, k]: Active power flow on branch l after outage of k
+        post_p = p_flow[:, None] + self.lodf * p_flow[None, :]
+        post_loading = (np.sqrt(post_p**2 + q_flow[:, None]**2)
+                        / rating[:, None] * 100)
+        np.fill_diagonal(post_loading, 0)
+        critical = (post_loading
+                    > self.threshold * max_loading[:, None]).any(axis=0)
+        critical &= ~self.splitting
+
+        return [(element, idx) for (element, idx, _), crit
+                in zip(self.branches, critical)
+                if crit and element in self.elements]
+
+    def check(self, net, backend, outages, setpoints: tuple=()):
+        """ AC power flow for every given outage. Returns the penalties. """
+        self.n_ac_checks += len(outages)
+        if self.n_workers > 1:
+            if self.executor is None:
+                # The net is sent to every worker only once
+                self.executor = ProcessPoolExecutor(
+                    self.n_workers, initializer=init_worker,
+                    initargs=(net, backend, self.constraints,
+                              self.failure_costs))
+            try:
+                futures = [self.executor.submit(check_in_worker, setpoints,
+                                                outage) for outage in outages]
+            except (AttributeError, RuntimeError):
+                # Pool closed in the meantime (cancellation)
+                return [self.failure_costs] * len(outages)
+            self.futures = futures
+            penalties = []
+            for future in futures:
+                try:
+                    penalties.append(future.result())
+                except CancelledError:
+                    penalties.append(self.failure_costs)
+            return penalties
+
+        # Serial: work on a cached copy to keep the base case results of
+        # the net
+        # (bound locally, because 'close' can reset it from another thread)
+        net_copy = self.net_copy
+        if net_copy is None:
+            net_copy = self.net_copy = deepcopy(net)
+        apply_setpoints(net_copy, setpoints)
+        return [check_outage(net_copy, backend, outage, self.constraints,
+                             self.failure_costs) for outage in outages]
+
+    def close(self):
+        """ Stop the worker processes (pending checks get cancelled). """
+        for future in self.futures:
+            future.cancel()
+        self.futures = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self.net_copy = None
+
+
+# Net, backend and settings of a worker process (see 'init_worker')
+WORKER = {}
+
+
+def init_worker(net, backend, constraints, failure_costs):
+    WORKER.update(net=net, backend=backend, constraints=constraints,
+                  failure_costs=failure_costs)
+
+
+def check_in_worker(setpoints, outage):
+    """ Check a single outage with the net of the worker process. """
+    apply_setpoints(WORKER['net'], setpoints)
+    return check_outage(WORKER['net'], WORKER['backend'], outage,
+                        WORKER['constraints'], WORKER['failure_costs'])
+
+
+def apply_setpoints(net, setpoints):
+    """ Set the actuator values of an individual. """
+    for (unit_type, actuator, idx), value in setpoints:
+        net[unit_type].at[idx, actuator] = value
+
+
+def check_outage(net, backend, outage, constraints, failure_costs):
+    """ Penalty of constraint violations after a single outage. """
+    element, idx = outage
+    net[element].at[idx, 'in_service'] = False
+    try:
+        backend.run(net)
+        penalty, _ = penalty_fct(net, constraints)
+    except Exception:
+        penalty = failure_costs
+    finally:
+        net[element].at[idx, 'in_service'] = True
+    return penalty
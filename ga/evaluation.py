@@ -0,0 +1,181 @@
+# evaluation.py
+"""
+Evaluation service for the pandapower ga-OPF: A long-running process keeps
+prepared nets (defaults set, pandapower imported, internal model built)
+in memory and evaluates whole gene matrices on request. This way,
+short-lived optimization jobs do not have to pay for the setup again and
+several workers can share one service.
+
+Server:  serve(address=('localhost', 6000))  # prints the authkey
+Client:  client = ServiceClient(authkey, address)
+         client.register('cigre', net, variables, obj_fct='min_p_loss')
+         ga = GeneticAlgorithm(..., evaluator=ServiceEvaluator(client,
+                                                               'cigre'))
+
+'EvaluationService' itself offers the same interface as the client and can
+be used as in-process stand-in (e.g. for tests).
+
+"""
+
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+import secrets
+import threading
+
+import numpy as np
+
+
+DEFAULT_ADDRESS = ('localhost', 6000)
+
+
+class EvaluationService:
+    def __init__(self):
+        # net_id -> (prepared GeneticAlgorithm, lock)
+        self.problems = {}
+
+    def register(self, net_id: str, net, variables, **settings):
+        """ Prepare a net for evaluation. 'settings' are passed to the
+        GeneticAlgorithm (e.g. obj_fct, constraints, pf_backend). """
+        from .pp_ga import GeneticAlgorithm
+        ga = GeneticAlgorithm(pop_size=1, variables=variables, net=net,
+                              **settings)
+        ga.n_evals = 0
+        ga.termination_crit.reset(ga)
+        ga.init_pop()
+        # First power flow: imports, jit compilation, internal model
+        ga.evaluate(ga.best_ind)
+        # Dummy best individual (required for the option 'skip_infeasible')
+        ga.best_ind.fitness = np.inf
+        self.problems[net_id] = (ga, threading.Lock())
+        return True
+
+    def evaluate(self, net_id: str, genes):
+        """ Evaluate a gene matrix (one row per individual). Returns a
+        dictionary of result arrays. """
+        from .individual import Individual
+        from .penalty_fcts import pre_pf_penalties
+
+        ga, lock = self.problems[net_id]
+        genes = np.asarray(genes, dtype=float)
+        with lock:
+            pre_penalties = pre_pf_penalties(ga.net, ga.constraints, ga.vars,
+                                             genes)
+            inds = []
+            for row, pre_penalty in zip(genes, pre_penalties):
+                ind = Individual(ga.vars, ga.net)
+                ind.set_genes(row)
+                ga.evaluate(ind, pre_penalty)
+                inds.append(ind)
+
+        n_objectives = len(ga.obj_fcts) if ga.multi_objective else 0
+        return results_of(inds, n_objectives)
+
+    def handle(self, request):
+        """ Dispatch a request tuple of a client: ('register', net_id, net,
+        variables, settings) or ('evaluate', net_id, genes). """
+        method, *args = request
+        if method == 'register':
+            net_id, net, variables, settings = args
+            return self.register(net_id, net, variables, **settings)
+        if method == 'evaluate':
+            return self.evaluate(*args)
+        raise ValueError(f'Request "{method}" not possible')
+
+
+class ServiceClient:
+    """ Connection to an evaluation service in another process (or on
+    another node). Same interface as 'EvaluationService'. 'authkey' is the
+    key of the service (bytes or hex string as printed by 'serve'). """
+    def __init__(self, authkey, address=DEFAULT_ADDRESS):
+        if isinstance(authkey, str):
+            authkey = bytes.fromhex(authkey)
+        self.conn = Client(address, authkey=authkey)
+        self.lock = threading.Lock()
+
+    def request(self, *request):
+        with self.lock:
+            self.conn.send(request)
+            status, response = self.conn.recv()
+        if status == 'error':
+            raise RuntimeError(f'Evaluation service: {response}')
+        return response
+
+    def register(self, net_id: str, net, variables, **settings):
+        return self.request('register', net_id, net, variables, settings)
+
+    def evaluate(self, net_id: str, genes):
+        return self.request('evaluate', net_id, np.asarray(genes))
+
+    def close(self):
+        self.conn.close()
+
+
+class ServiceEvaluator:
+    """ Evaluator for the GeneticAlgorithm (option 'evaluator') that
+    delegates the evaluation of whole populations to a service (client or
+    in-process 'EvaluationService'). """
+    def __init__(self, service, net_id: str):
+        self.service = service
+        self.net_id = net_id
+
+    def evaluate(self, genes):
+        return self.service.evaluate(self.net_id, genes)
+
+
+def results_of(inds, n_objectives: int=0):
+    """ Collect the evaluation results of individuals as arrays (and their
+    objective values in multi-objective mode). """
+    results = {
+        'fitness': np.array([np.nan if ind.fitness is None else ind.fitness
+                             for ind in inds], dtype=float),
+        'penalty': np.array([getattr(ind, 'penalty', np.nan)
+                             for ind in inds], dtype=float),
+        'valid': np.array([bool(ind.valid) for ind in inds]),
+        'failure': np.array([bool(ind.failure) for ind in inds])}
+    if n_objectives:
+        results['objectives'] = np.array(
+            [getattr(ind, 'objectives', np.full(n_objectives, np.nan))
+             for ind in inds], dtype=float).reshape(len(inds), n_objectives)
+    return results
+
+
+def serve(address=DEFAULT_ADDRESS, authkey: bytes=None, service=None):
+    """ Run the evaluation service until the process gets killed. Every
+    client connection is handled in its own thread.
+
+    authkey: Secret key clients have to know (the connection unpickles
+    requests, so never use a known key). If None, a random key gets
+    generated and printed. """
+    if authkey is None:
+        authkey = secrets.token_bytes(32)
+        print(f'Authkey of the evaluation service: {authkey.hex()}')
+    service = service or EvaluationService()
+    with Listener(address, authkey=authkey) as listener:
+        print(f'Evaluation service listening on {listener.address}')
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError) as error:
+                # A rejected client must not stop the service
+                print(f'Connection refused: {error!r}')
+                continue
+            threading.Thread(target=handle_connection, args=(service, conn),
+                             daemon=True).start()
+
+
+def handle_connection(service, conn):
+    """ Answer requests of a single client until it disconnects. """
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            try:
+                conn.send(('ok', service.handle(request)))
+            except Exception as error:
+                conn.send(('error', repr(error)))
+
+
+if __name__ == '__main__':
+    serve()
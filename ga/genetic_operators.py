@@ -5,11 +5,13 @@ selection, crossover, and mutation operators.
 
 """
 
+from copy import copy
 import random
 
 import numpy as np
 
 from .individual import Individual
+from .penalty_fcts import get_constraints
 
 
 class Mixin:
@@ -38,7 +40,10 @@ class Mixin:
             parent1 = random.choice(self.parents)
             parent2 = random.choice(self.parents)
             crossover = getattr(self, cross_operator)
-            child_chromosomes = crossover(parent1, parent2)
+            # Copy genes, so that mutation of the child does not alter
+            # the parents (which may survive in the multi-objective mode)
+            child_chromosomes = [
+                copy(gene) for gene in crossover(parent1, parent2)]
             # Create new individual as child of two parents
             child = Individual(self.vars, self.net, child_chromosomes)
             self.pop.append(child)
@@ -71,15 +76,96 @@ class Mixin:
 
         # Initialize diverse random numbers to decide how mutation goes
         randoms = np.random.rand(len(self.pop), len(self.vars), 2)
+        total_prob = sum(mut_operators.values())
         # Check every gene of every individual if to mutate
         for idx1, ind in enumerate(self.pop):
+            # Remember applied operators (for adaptation)
+            ind.mut_operators = []
             for idx2, gene in enumerate(ind):
                 if randoms[idx1, idx2, 0] > mutation_rate:
                     continue
 
                 # Perform mutation -> Decide which operator to use
+                # (roulette wheel over the operator probabilities)
                 probability = 0
                 for mut_operator, prob in mut_operators.items():
                     probability += prob
-                    if prob <= randoms[idx1, idx2, 1]:
+                    if randoms[idx1, idx2, 1] * total_prob < probability:
                         getattr(gene, mut_operator)()
+                        ind.mut_operators.append(mut_operator)
+                        break
+
+    # ---------------------Repair operators-------------------------
+    def repair(self):
+        """ Repair: Project the genes of every individual onto the feasible
+        region of all constraints that are known without power flow
+        calculation. This way, no power flow is wasted on individuals that
+        are penalized anyway. """
+        for ind in self.pop:
+            self.repair_ind(ind)
+
+    def repair_ind(self, ind):
+        """ Repair a single individual. Currently: Max apparent power of
+        gens and sgens ('max_s_mva'), if 'apparent_power' is considered.
+        If p and q are both optimized, both get scaled down. Otherwise, only
+        the optimized one gets reduced. """
+        for s_max, p_pos, q_pos, p_fixed, q_fixed in self.s_limits:
+            p = ind[p_pos].value if p_pos is not None else p_fixed
+            q = ind[q_pos].value if q_pos is not None else q_fixed
+            s = (p**2 + q**2)**0.5
+            if s <= s_max:
+                continue
+
+            if p_pos is not None and q_pos is not None:
+                factor = s_max / s
+                p, q = p * factor, q * factor
+            elif q_pos is not None:
+                q = np.sign(q) * max(s_max**2 - p**2, 0)**0.5
+            else:
+                p = np.sign(p) * max(s_max**2 - q**2, 0)**0.5
+
+            # Genes can be shared between individuals -> copy before change
+            for pos, value in ((p_pos, p), (q_pos, q)):
+                if pos is not None:
+                    ind[pos] = copy(ind[pos])
+                    ind[pos].value = value
+
+    def apparent_power_limits(self):
+        """ Collect all gens and sgens that can be repaired regarding their
+        max apparent power: (s_max, position of p gene, position of q gene,
+        fixed p, fixed q) respectively. """
+        if 'apparent_power' not in get_constraints(self.net, self.constraints):
+            return ()
+
+        positions = {tuple(var): pos for pos, var in enumerate(self.vars)}
+        limits = []
+        for gen_type in ('gen', 'sgen'):
+            if 'max_s_mva' not in self.net[gen_type]:
+                continue
+            for idx in self.net[gen_type].index:
+                p_pos = positions.get((gen_type, 'p_mw', idx))
+                q_pos = positions.get((gen_type, 'q_mvar', idx))
+                if p_pos is None and q_pos is None:
+                    continue
+                if not np.isfinite(self.net[gen_type].max_s_mva[idx]):
+                    # No limit defined for this unit
+                    continue
+                q_fixed = (self.net[gen_type].q_mvar[idx]
+                           if 'q_mvar' in self.net[gen_type] else 0)
+                limits.append((self.net[gen_type].max_s_mva[idx], p_pos,
+                               q_pos, self.net[gen_type].p_mw[idx], q_fixed))
+
+        return tuple(limits)
+
+    def refill(self, max_tries: int=10):
+        """ Replace individuals with failed power flow by new random (and
+        repaired) individuals, so that the population size stays constant.
+        Every slot gets 'max_tries' attempts. """
+        for idx, ind in enumerate(self.pop):
+            for _ in range(max_tries):
+                if not ind.failure or self.stop_evaluation():
+                    break
+                ind = Individual(self.vars, self.net)
+                self.repair_ind(ind)
+                self.evaluate(ind)
+            self.pop[idx] = ind
@@ -0,0 +1,144 @@
+# history.py
+"""
+Recording of the complete optimization history (genes, fitness, penalty,
+validity of every individual of every generation) to disk for tuning and
+audits.
+
+During the run, generations are buffered and written as chunks of .npy
+files, so that the history never has to fit into RAM. After the run, the
+chunks are merged into one .npy file per field, which can be memory-mapped
+for fast analysis of many runs.
+
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+
+
+FIELDS = ('generation', 'genes', 'fitness', 'penalty', 'valid', 'failure')
+
+
+class HistoryRecorder:
+    def __init__(self, path: str, variables: tuple, chunk_size: int=10):
+        """ path: Folder to store the history in.
+
+        variables: The variables of the optimization (stored as meta data).
+
+        chunk_size: Number of generations to buffer before writing. """
+        self.path = os.path.join(path, '')
+        self.variables = [list(var) for var in variables]
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.n_chunks = 0
+        self.n_generations = 0
+
+        os.makedirs(self.path, exist_ok=True)
+        for field in FIELDS:
+            # Remove history of an earlier run (but no other files)
+            for filename in (self.chunk_files(field)
+                             + glob.glob(f'{self.path}{field}.npy')):
+                os.remove(filename)
+
+    def chunk_files(self, field: str):
+        """ Sorted chunk files of a field. """
+        return sorted(glob.glob(f'{self.path}chunk[0-9]*_{field}.npy'))
+
+    def record(self, generation: int, pop):
+        """ Append the evaluated population of one generation. """
+        self.buffer.append({
+            'generation': np.full(len(pop), generation, dtype=np.int32),
+            'genes': np.array([ind.genes for ind in pop], dtype=float
+                              ).reshape(len(pop), len(self.variables)),
+            'fitness': np.array([np.nan if ind.fitness is None
+                                 else ind.fitness for ind in pop]),
+            'penalty': np.array([getattr(ind, 'penalty', np.nan)
+                                 for ind in pop], dtype=float),
+            'valid': np.array([bool(ind.valid) for ind in pop]),
+            'failure': np.array([bool(ind.failure) for ind in pop])})
+        self.n_generations += 1
+
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """ Write all buffered generations as new chunk to disk. """
+        if not self.buffer:
+            return
+        for field in FIELDS:
+            np.save(f'{self.path}chunk{self.n_chunks:05d}_{field}.npy',
+                    np.concatenate([gen[field] for gen in self.buffer]))
+        self.buffer = []
+        self.n_chunks += 1
+
+    def close(self):
+        """ Merge all chunks into one file per field (streamed, without
+        loading everything into RAM) and write meta data. """
+        self.flush()
+        for field in FIELDS:
+            chunk_files = self.chunk_files(field)
+            chunks = [np.load(filename, mmap_mode='r')
+                      for filename in chunk_files]
+            n_rows = sum(len(chunk) for chunk in chunks)
+            if chunks:
+                shape = (n_rows, ) + chunks[0].shape[1:]
+                dtype = chunks[0].dtype
+            else:
+                shape = (0, len(self.variables)) if field == 'genes' else (0, )
+                dtype = float
+            merged = np.lib.format.open_memmap(
+                f'{self.path}{field}.npy', mode='w+', dtype=dtype,
+                shape=shape)
+            row = 0
+            for chunk in chunks:
+                merged[row:row + len(chunk)] = chunk
+                row += len(chunk)
+            merged.flush()
+            del merged, chunks
+            for filename in chunk_files:
+                os.remove(filename)
+
+        with open(f'{self.path}meta.json', 'w') as file:
+            json.dump({'variables': self.variables,
+                       'n_generations': self.n_generations}, file)
+
+
+class HistoryReader:
+    """ Memory-mapped access to a recorded history, e.g.:
+    reader['fitness'][reader['generation'] == 5] """
+    def __init__(self, path: str):
+        self.path = os.path.join(path, '')
+        with open(f'{self.path}meta.json') as file:
+            meta = json.load(file)
+        self.variables = [tuple(var) for var in meta['variables']]
+        self.n_generations = meta['n_generations']
+
+    def __getitem__(self, field: str):
+        if field not in FIELDS:
+            raise KeyError(f'Field "{field}" not recorded')
+        return np.load(f'{self.path}{field}.npy', mmap_mode='r')
+
+    def generation(self, generation: int):
+        """ All fields of a single generation as dictionary. """
+        rows = np.where(self['generation'] == generation)[0]
+        if len(rows) == 0:
+            return {field: self[field][:0] for field in FIELDS}
+        # Generations are stored consecutively -> slicing is enough
+        return {field: self[field][rows[0]:rows[-1] + 1] for field in FIELDS}
+
+    def best_fit_course(self):
+        """ Best fitness of every generation. """
+        fitness = np.where(self['failure'], np.nan, self['fitness'])
+        course = np.full(self.n_generations, np.nan)
+        np.fmin.at(course, self['generation'], fitness)
+        return course
+
+
+def read_histories(path: str):
+    """ Yield a reader for every recorded history in the folder 'path' and
+    its subfolders (e.g. thousands of runs). """
+    pattern = os.path.join(path, '**', 'meta.json')
+    for filename in sorted(glob.glob(pattern, recursive=True)):
+        yield HistoryReader(os.path.dirname(filename))
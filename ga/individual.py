@@ -7,48 +7,53 @@ import random
 
 import numpy as np
 
+from .variables import VariableSet
+
 
 class Individual:
-    def __init__(self, vars_in: tuple, net: object, set_vars: tuple=None):
+    def __init__(self, vars_in: tuple, net: object, set_vars: tuple=None,
+                 values: tuple=None):
         if set_vars is not None:
             self.vars = set_vars
             assert isinstance(set_vars[0], LmtNumber)
         else:
-            self.random_init(vars_in, net)
+            self.random_init(vars_in, net, values)
         self.reset()
 
-    def random_init(self, vars_in, net):
+    def random_init(self, vars_in, net, values=None):
+        """ Create all genes with random values (or with the given gene
+        values, e.g. from a sampling). """
+        if not isinstance(vars_in, VariableSet):
+            vars_in = VariableSet(net, vars_in)
+        if values is None:
+            values = [None] * len(vars_in)
+
         self.vars = []
-        for unit_type, actuator, idx in vars_in:
-            if unit_type == 'gen' and actuator == 'vm_pu':
-                # AVR regulation
-                var = LmtFloat(
-                    min_boundary=net.bus.min_vm_pu[idx],
-                    max_boundary=net.bus.max_vm_pu[idx],
-                    distribution='normal')
-            elif unit_type in ('gen', 'sgen', 'load'):
-                # Active or reactive power regulation
-                var = LmtFloat(
-                    min_boundary=net[unit_type][f'min_{actuator}'][idx],
-                    max_boundary=net[unit_type][f'max_{actuator}'][idx])
-            elif actuator == 'tap_pos':
-                # Tap-changing transformer regulation
-                var = LmtInt(
-                    min_boundary=net[unit_type]['tap_min'][idx],
-                    max_boundary=net[unit_type]['tap_max'][idx],
-                    distribution='normal')
-            elif actuator == 'step':
-                # Shunt regulation
-                var = LmtInt(
-                    min_boundary=0,
-                    max_boundary=net[unit_type]['max_step'][idx])
+        for min_value, max_value, is_int, is_normal, value in zip(
+                vars_in.min_values.tolist(), vars_in.max_values.tolist(),
+                vars_in.is_int.tolist(), vars_in.is_normal.tolist(),
+                values):
+            distribution = 'normal' if is_normal else 'equally'
+            if is_int:
+                var = LmtInt(min_boundary=int(min_value),
+                             max_boundary=int(max_value),
+                             set_value=value, distribution=distribution)
             else:
-                raise ValueError(f"""
-                    The combination {unit_type}, {actuator}, {idx} is not possible
-                    (Maybe not implemented yet)""")
-
+                var = LmtFloat(min_boundary=min_value,
+                               max_boundary=max_value,
+                               set_value=value, distribution=distribution)
             self.vars.append(var)
 
+    def set_genes(self, values):
+        """ Set the values of all genes (e.g. from a gene vector). """
+        for var, value in zip(self.vars, values):
+            var.value = value
+
+    @property
+    def genes(self):
+        """ Values of all genes as array. """
+        return np.array([var.value for var in self.vars], dtype=float)
+
     def reset(self):
         self.fitness = None
         # Did this individual lead to failed power flow calculation?
@@ -87,6 +92,12 @@ class LmtNumber:
         else:
             self.random_init()
 
+    def normal_sample(self, sigma: float=0.2):
+        """ Normally distributed random value, centered in the range and
+        clipped to the boundaries. """
+        return (self.min_boundary
+                + self.range * np.clip(np.random.normal(0.5, sigma), 0, 1))
+
     def __repr__(self):
         return str(self.value)
 
@@ -109,8 +120,7 @@ class LmtInt(LmtNumber):
         if self.distribution == 'equally':
             self.value = random.randint(self.min_boundary, self.max_boundary)
         elif self.distribution == 'normal':
-            self.value = round(np.random.normal(0, 0.5) * self.range
-                               + self.min_boundary)
+            self.value = round(self.normal_sample())
 
     def increase(self):
         self.value += 1
@@ -134,7 +144,7 @@ class LmtFloat(LmtNumber):
         if self.distribution == 'equally':
             self.value = random.random() * self.range + self.min_boundary
         elif self.distribution == 'normal':
-            self.value = np.random.normal(0, 0.5) * self.range + self.min_boundary
+            self.value = self.normal_sample()
 
     def increase(self):
         self.value += random.random() * self.range / 10
@@ -0,0 +1,94 @@
+# memetic.py
+"""
+Memetic extension of the pandapower ga-OPF: The best individuals get
+refined by a derivative-free local search (compass/pattern search) of
+their continuous genes every few generations. Integer genes (taps, shunt
+steps) stay fixed.
+
+"""
+
+from copy import copy
+
+from .individual import Individual, LmtFloat
+
+
+class Mixin:
+    def memetic_step(self, top_k: int=2, budget: int=20,
+                     init_step: float=0.1, min_step: float=1e-3):
+        """ Refine the 'top_k' best individuals of the population with
+        pattern search. Each refinement may use up to 'budget' fitness
+        evaluations (power flows). Steps are relative to the range of the
+        respective gene. """
+        self.pop = list(self.pop)
+        order = sorted(range(len(self.pop)),
+                       key=lambda idx: self.pop[idx].fitness)
+        n_evals_before = self.n_evals
+        best_fitness_before = self.best_ind.fitness
+
+        for idx in order[:top_k]:
+            ind = self.pop[idx]
+            refined = self.pattern_search(ind, budget, init_step, min_step)
+            if refined.fitness < ind.fitness:
+                self.memetic_stats['n_improved'] += 1
+                self.pop[idx] = refined
+                if refined.fitness < self.best_ind.fitness:
+                    self.best_ind = refined
+                    self.total_best_fit_course[-1] = refined.fitness
+
+        self.memetic_stats['n_evals'] += self.n_evals - n_evals_before
+        # Improvement of the total best solution
+        self.memetic_stats['improvement'] += float(
+            best_fitness_before - self.best_ind.fitness)
+        self.memetic_stats['n_calls'] += 1
+
+    def pattern_search(self, ind, budget: int, init_step: float,
+                       min_step: float):
+        """ Compass search: Try a step up and down for every continuous
+        gene and keep every improvement. If no step improves the solution,
+        the step size gets halved. """
+        positions = [pos for pos, gene in enumerate(ind)
+                     if isinstance(gene, LmtFloat)]
+        best = ind
+        step = init_step
+        n_evals = 0
+        while step >= min_step and n_evals < budget:
+            improved = False
+            for pos in positions:
+                for direction in (1, -1):
+                    if n_evals >= budget or self.stop_evaluation():
+                        return best
+                    candidate = Individual(
+                        self.vars, self.net, [copy(gene) for gene in best])
+                    candidate[pos].value += (
+                        direction * step * candidate[pos].range)
+                    if candidate[pos].value == best[pos].value:
+                        # Already at the boundary
+                        continue
+                    self.evaluate(candidate)
+                    n_evals += 1
+                    if (not candidate.failure
+                            and candidate.fitness < best.fitness):
+                        best = candidate
+                        improved = True
+                        break
+            if not improved:
+                step /= 2
+
+        return best
+
+    def memetic_report(self):
+        """ Compare the power flows used by the local search with the
+        generations it saved. Saved generations are estimated from the
+        average improvement per generation of the genetic algorithm. """
+        stats = dict(self.memetic_stats)
+        stats['generations_used'] = stats['n_evals'] / self.pop_size
+
+        course = self.total_best_fit_course
+        ga_improvement = (course[0] - course[-1]) - stats['improvement']
+        n_generations = max(len(course) - 1, 1)
+        if ga_improvement > 0:
+            stats['generations_saved'] = (
+                stats['improvement'] / (ga_improvement / n_generations))
+        else:
+            stats['generations_saved'] = None
+        return stats
@@ -0,0 +1,103 @@
+# nsga2.py
+"""
+Multi-objective optimization for the pandapower ga-OPF based on NSGA-II
+(Deb et al., 2002): Vectorized fast non-dominated sorting, crowding distance,
+crowded tournament selection, and elitist environmental selection.
+
+"""
+
+import random
+
+import numpy as np
+
+
+class Mixin:
+    def environmental_selection(self):
+        """ Merge the survivors of the last generation with the evaluated
+        offspring and keep the best 'pop_size' individuals regarding
+        non-domination rank and crowding distance (elitism). Only the
+        offspring need to be evaluated, so that a generation costs as many
+        power flows as in the single-objective case. """
+        combined = tuple(self.survivors) + tuple(self.pop)
+        objectives = np.array([ind.objectives for ind in combined])
+        ranks = non_dominated_sort(objectives)
+        distances = crowding_distance(objectives, ranks)
+
+        # Sort by rank first and by descending crowding distance second
+        order = np.lexsort((-distances, ranks))[:self.pop_size]
+        for idx in order:
+            combined[idx].rank = ranks[idx]
+            combined[idx].crowding = distances[idx]
+
+        self.pop = tuple(combined[idx] for idx in order)
+        self.survivors = self.pop
+        self.pareto_front = tuple(ind for ind in self.pop if ind.rank == 0)
+
+    def crowded_tournament(self, group_size: int=2):
+        """ Crowded tournament selection: Select the best of 'group_size'
+        random individuals as parent, first by rank, then by crowding
+        distance. Repeat until there are 'pop_size' parents. """
+        for _ in range(self.pop_size):
+            group = random.sample(self.pop, min(group_size, len(self.pop)))
+            parent = min(group, key=lambda ind: (ind.rank, -ind.crowding))
+            self.parents.append(parent)
+
+    def pareto_objectives(self):
+        """ Objective values of the Pareto front as matrix with one row
+        per solution. """
+        return np.array([ind.objectives for ind in self.pareto_front])
+
+
+def non_dominated_sort(objectives):
+    """ Fast non-dominated sorting of an objective matrix (one row per
+    solution, all objectives minimized). Returns the rank (number of the
+    front, starting with 0) of every solution. """
+    objectives = np.asarray(objectives, dtype=float)
+    n_solutions = len(objectives)
+
+    # dominates[i, j] is True if solution i dominates solution j
+    not_worse = (objectives[:, None, :] <= objectives[None, :, :]).all(axis=2)
+    better = (objectives[:, None, :] < objectives[None, :, :]).any(axis=2)
+    dominates = not_worse & better
+    n_dominators = dominates.sum(axis=0)
+
+    ranks = np.full(n_solutions, -1, dtype=int)
+    remaining = np.ones(n_solutions, dtype=bool)
+    rank = 0
+    while remaining.any():
+        front = remaining & (n_dominators == 0)
+        ranks[front] = rank
+        remaining &= ~front
+        n_dominators = n_dominators - dominates[front].sum(axis=0)
+        rank += 1
+
+    return ranks
+
+
+def crowding_distance(objectives, ranks):
+    """ Crowding distance of every solution within its front. Boundary
+    solutions of a front get infinite distance. """
+    objectives = np.asarray(objectives, dtype=float)
+    distances = np.zeros(len(objectives))
+
+    for rank in np.unique(ranks):
+        idxs = np.where(ranks == rank)[0]
+        if len(idxs) <= 2:
+            distances[idxs] = np.inf
+            continue
+
+        front = objectives[idxs]
+        order = np.argsort(front, axis=0)
+        sorted_front = np.take_along_axis(front, order, axis=0)
+        span = sorted_front[-1] - sorted_front[0]
+        span[span == 0] = 1
+
+        sorted_dist = np.zeros(front.shape)
+        sorted_dist[1:-1] = (sorted_front[2:] - sorted_front[:-2]) / span
+        sorted_dist[[0, -1]] = np.inf
+
+        dist = np.zeros(front.shape)
+        np.put_along_axis(dist, order, sorted_dist, axis=0)
+        distances[idxs] = dist.sum(axis=1)
+
+    return distances
@@ -0,0 +1,219 @@
+# parallel.py
+"""
+Parallel evaluation of populations with shared memory (python>=3.8): The
+gene matrix of the population and all result arrays (fitness, penalty,
+validity, failure, optionally objectives and bus voltages) live in
+preallocated shared memory buffers. Every worker process gets the net only
+once at startup, reads its slice of genes and writes its results in place.
+Per generation, only small control messages ((start, stop) and 'done' with
+possible errors) are exchanged, independent of population or grid size.
+
+Usage: with SharedMemoryEvaluator(net, variables, max_pop_size=100,
+                                  n_workers=4, obj_fct='min_p_loss') as ev:
+           GeneticAlgorithm(..., evaluator=ev).run()
+
+"""
+
+import multiprocessing as mp
+
+import numpy as np
+
+from .variables import expand_variables
+
+
+class SharedMemoryEvaluator:
+    def __init__(self, net, variables, max_pop_size: int,
+                 n_workers: int=None, voltages: bool=False, **settings):
+        """ net, variables: As for the GeneticAlgorithm.
+
+        max_pop_size: Max number of individuals per evaluation (size of the
+        buffers).
+
+        n_workers: Number of worker processes (default: number of cpus).
+
+        voltages: If True -> Bus voltages of every individual are written
+        to the shared buffer 'vm_pu', too.
+
+        settings: Settings of the evaluation that are passed to the
+        GeneticAlgorithm in the workers (e.g. obj_fct, constraints). """
+        try:
+            from multiprocessing import shared_memory
+        except ImportError:
+            raise ImportError('Shared memory evaluation requires python>=3.8')
+
+        # Expand bulk variables like ('sgen', 'q_mvar', 'all') once
+        variables = expand_variables(net, variables)
+        n_objectives = (len(settings['obj_fct'])
+                        if isinstance(settings.get('obj_fct'), (list, tuple))
+                        else 0)
+        self.specs = {
+            'genes': ((max_pop_size, len(variables)), np.float64),
+            'fitness': ((max_pop_size, ), np.float64),
+            'penalty': ((max_pop_size, ), np.float64),
+            'valid': ((max_pop_size, ), np.bool_),
+            'failure': ((max_pop_size, ), np.bool_),
+            # Set to True to cancel running evaluations
+            'cancel': ((1, ), np.bool_)}
+        if n_objectives:
+            self.specs['objectives'] = ((max_pop_size, n_objectives),
+                                        np.float64)
+        if voltages:
+            self.specs['vm_pu'] = ((max_pop_size, len(net.bus.index)),
+                                   np.float64)
+
+        self.memory = {}
+        self.buffers = {}
+        for name, (shape, dtype) in self.specs.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            self.memory[name] = shared_memory.SharedMemory(create=True,
+                                                           size=size)
+            self.buffers[name] = np.ndarray(shape, dtype=dtype,
+                                            buffer=self.memory[name].buf)
+        self.buffers['cancel'][0] = False
+
+        self.max_pop_size = max_pop_size
+        n_workers = n_workers or mp.cpu_count()
+        names = {name: shm.name for name, shm in self.memory.items()}
+        self.conns = []
+        self.workers = []
+        for _ in range(n_workers):
+            conn, worker_conn = mp.Pipe()
+            worker = mp.Process(
+                target=worker_main, daemon=True,
+                args=(worker_conn, names, self.specs, net, variables,
+                      settings))
+            worker.start()
+            self.conns.append(conn)
+            self.workers.append(worker)
+
+        # Wait until all workers are prepared
+        for conn in self.conns:
+            status = conn.recv()
+            if status != 'ready':
+                self.close()
+                raise RuntimeError(f'Worker preparation failed: {status}')
+
+    def evaluate(self, genes):
+        """ Evaluate a gene matrix in parallel. Returns a dictionary of
+        result arrays (copies of the shared buffers). """
+        genes = np.asarray(genes, dtype=float)
+        n_inds = len(genes)
+        assert n_inds <= self.max_pop_size, 'Population too large!'
+        n_genes = self.specs['genes'][0][1]
+        assert genes.shape[1:] == (n_genes, ), 'Wrong number of genes!'
+        self.buffers['cancel'][0] = False
+        self.buffers['genes'][:n_inds] = genes
+
+        bounds = np.linspace(0, n_inds, len(self.conns) + 1).astype(int)
+        # No empty slices (e.g. single individuals of 'refill')
+        busy = [(conn, start, stop) for conn, start, stop
+                in zip(self.conns, bounds[:-1], bounds[1:]) if stop > start]
+        for conn, start, stop in busy:
+            conn.send((int(start), int(stop)))
+        for conn, _, _ in busy:
+            _, errors = conn.recv()
+            for error in errors:
+                print(f'Evaluation in worker failed: {error}')
+
+        return {name: self.buffers[name][:n_inds].copy()
+                for name in self.specs if name not in ('genes', 'cancel')}
+
+    def cancel(self):
+        """ Stop the running evaluations (thread-safe). Individuals that are
+        not evaluated yet are marked as failure. """
+        self.buffers['cancel'][0] = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Stop workers and release shared memory. """
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.conns = []
+        self.workers = []
+        self.buffers = {}
+        for shm in self.memory.values():
+            shm.close()
+            shm.unlink()
+        self.memory = {}
+
+
+def worker_main(conn, names, specs, net, variables, settings):
+    """ Worker process: Prepare net once, then evaluate slices of the
+    shared gene matrix on request until None is received. """
+    from multiprocessing import shared_memory
+    from .evaluation import EvaluationService
+    from .individual import Individual
+    from .penalty_fcts import pre_pf_penalties
+
+    memory = {name: shared_memory.SharedMemory(name=shm_name)
+              for name, shm_name in names.items()}
+    buffers = {name: np.ndarray(shape, dtype=dtype, buffer=memory[name].buf)
+               for name, (shape, dtype) in specs.items()}
+
+    try:
+        service = EvaluationService()
+        service.register('net', net, variables, **settings)
+        ga, _ = service.problems['net']
+    except Exception as error:
+        conn.send(repr(error))
+        return
+    conn.send('ready')
+
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        start, stop = request
+        # Errors are reported, but must not break the worker
+        errors = []
+        try:
+            pre_penalties = pre_pf_penalties(
+                ga.net, ga.constraints, ga.vars,
+                buffers['genes'][start:stop])
+        except Exception as error:
+            errors.append(repr(error))
+            pre_penalties = None
+        for pos, row in enumerate(range(start, stop)):
+            ind = Individual(ga.vars, ga.net)
+            try:
+                ind.set_genes(buffers['genes'][row])
+                if buffers['cancel'][0] or pre_penalties is None:
+                    ind.failure = True
+                else:
+                    ga.evaluate(ind, pre_penalties[pos])
+            except Exception as error:
+                errors.append(repr(error))
+                ind.failure = True
+            write_results(buffers, row, ind, ga)
+        conn.send(('done', errors))
+
+    for shm in memory.values():
+        shm.close()
+
+
+def write_results(buffers, row, ind, ga):
+    """ Write the results of a single individual into the shared
+    buffers. """
+    evaluated = not ind.failure
+    buffers['failure'][row] = ind.failure
+    buffers['valid'][row] = bool(ind.valid) and evaluated
+    buffers['fitness'][row] = ind.fitness if evaluated else np.nan
+    buffers['penalty'][row] = getattr(ind, 'penalty', np.nan)
+    if 'objectives' in buffers:
+        buffers['objectives'][row] = (ind.objectives if evaluated
+                                      else np.nan)
+    if 'vm_pu' in buffers:
+        buffers['vm_pu'][row] = (ga.net.res_bus.vm_pu.values if evaluated
+                                 else np.nan)
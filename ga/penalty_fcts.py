@@ -2,18 +2,53 @@
 """
 A collection of penalty functions to punish selected constraint violations.
 
+Constraints are divided into pre-PF constraints, which only depend on the
+set-points of the actuators and can be checked before the power flow
+calculation, and post-PF constraints, which depend on power flow results.
+Every pre-PF constraint has a vectorized counterpart '<name>_pop' that
+calculates the penalties of a whole population at once.
+
 """
 
+import numpy as np
+
+
+# Registry of the constraints: name -> stage ('pre' or 'post' power flow)
+CONSTRAINTS = {'voltage_band': 'post',
+               'line_load': 'post',
+               'trafo_load': 'post',
+               'trafo3w_load': 'post',
+               'apparent_power': 'pre'}
 
-def penalty_fct(net, constraints: list):
+
+def penalty_fct(net, constraints: list, stage: str=None):
     """ Punish a set of constraints. Possible are: voltage band violation
     (String: 'voltage_band'), max line loading ('line_load'), max trafo
     loading ('trafo_load' and/or 'trafo3w_load'), max apparent power of
-    generators('apparent_power'). """
+    generators('apparent_power'). With stage='pre' or stage='post', only
+    the pre- or post-PF constraints are considered (see 'CONSTRAINTS'). """
     # TODO: Add option to make penelty adjustable! -> ((constraint1, penalty1) ...) ?
+    constraints = get_constraints(net, constraints, stage)
+    if not constraints:
+        return 0, True
+
+    penalty = sum([globals()[constraint](net) for constraint in constraints])
+
+    # Define under which circumstances a solution is seen as valid
+    if penalty > 0:
+        valid = False
+    else:
+        valid = True
+
+    return penalty, valid
+
+
+def get_constraints(net, constraints, stage: str=None):
+    """ Resolve the constraint options 'all' and 'none' to a tuple of
+    constraint names. Optionally, return only constraints of one stage. """
     if isinstance(constraints, str):
         if constraints == 'none':
-            return 0, True
+            constraints = ()
         elif constraints == 'all':
             if 'max_s_mva' in net.sgen and 'max_s_mva' in net.gen:
                 constraints = ('voltage_band', 'line_load', 'trafo_load',
@@ -21,16 +56,24 @@ def penalty_fct(net, constraints: list):
             else:
                 constraints = ('voltage_band', 'line_load',
                                'trafo_load', 'trafo3w_load')
+        else:
+            constraints = (constraints, )
 
-    penalty = sum([eval(constraint)(net) for constraint in constraints])
+    if stage is None:
+        return tuple(constraints)
+    return tuple(constr for constr in constraints
+                 if CONSTRAINTS[constr] == stage)
 
-    # Define under which circumstances a solution is seen as valid
-    if penalty > 0:
-        valid = False
-    else:
-        valid = True
 
-    return penalty, valid
+def pre_pf_penalties(net, constraints, variables, genes):
+    """ Vectorized calculation of all pre-PF penalties for a whole
+    population without any power flow calculation. 'genes' is a matrix of
+    gene values with one row per individual (columns as in 'variables').
+    Returns an array with one penalty per individual. """
+    penalties = np.zeros(len(genes))
+    for constraint in get_constraints(net, constraints, stage='pre'):
+        penalties += globals()[f'{constraint}_pop'](net, variables, genes)
+    return penalties
 
 
 def voltage_band(net, costs=1000000):
@@ -88,8 +131,36 @@ def apparent_power(net, costs=10000):
     penalty = 0
     for gen_type in ('gen', 'sgen'):
         s_gen = (net[gen_type].p_mw**2 + net[gen_type].q_mvar**2)**0.5
-        for idx, s_mva in zip(net[gen_type].index, s_gen):
-            if s_mva > net[gen_type].max_s_mva[idx]:
-                penalty += (s_mva - net[gen_type].max_s_mva[idx]) * costs
+        violation = (s_gen - net[gen_type].max_s_mva).clip(lower=0)
+        penalty += violation.sum() * costs
 
     return penalty
+
+
+def apparent_power_pop(net, variables, genes, costs=10000):
+    """ Vectorized version of 'apparent_power' for a whole population:
+    p and q of optimized units are taken from the genes, all others from
+    the net. """
+    genes = np.asarray(genes, dtype=float).reshape(len(genes), len(variables))
+    penalties = np.zeros(len(genes))
+    for gen_type in ('gen', 'sgen'):
+        if len(net[gen_type].index) == 0:
+            continue
+        index = list(net[gen_type].index)
+        p = np.tile(net[gen_type].p_mw.values.astype(float), (len(genes), 1))
+        q = np.tile(net[gen_type].q_mvar.values.astype(float),
+                    (len(genes), 1))
+        for col, (unit_type, actuator, idx) in enumerate(variables):
+            if unit_type != gen_type:
+                continue
+            if actuator == 'p_mw':
+                p[:, index.index(idx)] = genes[:, col]
+            elif actuator == 'q_mvar':
+                q[:, index.index(idx)] = genes[:, col]
+
+        s_gen = (p**2 + q**2)**0.5
+        violation = np.maximum(s_gen - net[gen_type].max_s_mva.values, 0)
+        # Units without limit (NaN) are ignored like in 'apparent_power'
+        penalties += np.nansum(violation, axis=1) * costs
+
+    return penalties
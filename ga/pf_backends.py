@@ -0,0 +1,92 @@
+# pf_backends.py
+"""
+A collection of power flow backends for the pandapower ga-OPF. A backend
+performs the power flow calculation for a given net with its power flow
+options. All backends are registered in 'BACKENDS' by their name.
+
+"""
+
+from copy import copy
+import importlib.util
+
+
+class Backend:
+    """ Base class of all power flow backends. Options given by the user
+    overwrite the default options of the respective backend. """
+    default_options = {}
+
+    def __init__(self, **pf_options):
+        self.pf_options = dict(self.default_options)
+        self.pf_options.update(pf_options)
+
+    @staticmethod
+    def available():
+        """ Check if all requirements of the backend are installed. """
+        return True
+
+    def run(self, net):
+        """ Perform power flow calculation. Raise an error if it fails. """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.pf_options})'
+
+
+class PandapowerNR(Backend):
+    """ Newton-Raphson power flow of pandapower (default). """
+    # Newer pandapower versions use lightsim2grid if installed ('auto')
+    default_options = {'algorithm': 'nr', 'enforce_q_lims': True,
+                       'lightsim2grid': False}
+
+    def run(self, net):
+        # Import on first use, so that importing the package stays fast
+        import pandapower as pp
+        pp.runpp(net, **self.pf_options)
+
+
+class PandapowerFastDecoupled(PandapowerNR):
+    """ Fast-decoupled power flow (XB version) of pandapower. Faster per
+    iteration, but possibly less robust for high R/X ratios. """
+    default_options = {'algorithm': 'fdbx', 'enforce_q_lims': False,
+                       'lightsim2grid': False}
+
+
+class LightSim2Grid(PandapowerNR):
+    """ Newton-Raphson power flow of pandapower, accelerated by the
+    optional c++ solver 'lightsim2grid' (only newer pandapower versions).
+    """
+    default_options = {'algorithm': 'nr', 'lightsim2grid': True}
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec('lightsim2grid') is not None
+
+
+# Registry: name -> backend class
+BACKENDS = {'pp_nr': PandapowerNR,
+            'pp_fdbx': PandapowerFastDecoupled,
+            'lightsim2grid': LightSim2Grid}
+
+
+def get_backend(backend='pp_nr', pf_options: dict=None):
+    """ Create backend from its name (see 'BACKENDS') or return the given
+    backend object (a copy, if options are given, to keep the original
+    unchanged). """
+    if isinstance(backend, Backend):
+        if pf_options:
+            backend = copy(backend)
+            backend.pf_options = {**backend.pf_options, **pf_options}
+        return backend
+
+    if backend not in BACKENDS:
+        raise ValueError(f'Power flow backend "{backend}" not implemented')
+    if not BACKENDS[backend].available():
+        raise ImportError(f'Power flow backend "{backend}" not installed')
+
+    return BACKENDS[backend](**(pf_options or {}))
+
+
+def available_backends():
+    """ Names of all backends that can be used in this environment. """
+    return tuple(name for name, backend in BACKENDS.items()
+                 if backend.available())
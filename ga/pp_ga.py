@@ -5,20 +5,37 @@ networks.
 
 """
 
+from collections import namedtuple
 from copy import deepcopy
+import itertools
 import json
 import sys
+import time
 
-import pandas as pd
-import pandapower as pp
+import numpy as np
 
+from . import adaptation
 from . import genetic_operators
+from . import memetic
+from . import nsga2
 from . import util
+from .archive import SolutionArchive, fingerprint, operating_conditions
+from .history import HistoryRecorder
 from .individual import Individual
-from .penalty_fcts import penalty_fct
+from .penalty_fcts import penalty_fct, pre_pf_penalties
+from .pf_backends import get_backend
+from .reporting import Reporter
+from .sampling import sample_genes
+from .termination import create_criterion
+from .variables import VariableSet
 
 
-class GeneticAlgorithm(genetic_operators.Mixin):
+# Intermediate result of 'GeneticAlgorithm.iter_run()'
+Snapshot = namedtuple('Snapshot', 'n_iter genes fitness valid n_evals')
+
+
+class GeneticAlgorithm(genetic_operators.Mixin, adaptation.Mixin,
+                       memetic.Mixin, nsga2.Mixin):
     def __init__(self,
                  pop_size: int,  # TODO: Find good default!
                  variables: list,  # TODO: pandapower settings as default!
@@ -29,15 +46,32 @@ class GeneticAlgorithm(genetic_operators.Mixin):
                  selection: str='tournament',
                  crossover: str='single_point',
                  mutation: dict={'increase': 0.5, 'decrease': 0.5},  # TODO: Find good default!
-                 termination: str='cmp_last',
+                 termination='cmp_last',
+                 repair: bool=False,
+                 skip_infeasible: bool=False,
+                 pf_backend='pp_nr',
+                 pf_options: dict=None,
+                 history=None,
+                 archive=None,
+                 warm_start: float=0.0,
+                 init_sampling: str='random',
+                 memetic: dict=None,
+                 adaptive: bool=False,
+                 contingency=None,
+                 evaluator=None,
                  plot: bool=False,
-                 save: bool=False):
+                 save: bool=False,
+                 live_plot: float=None):
         """
         pop_size: Population size; number of parallel solutions (called
         individuals here).
 
         variables: All degrees of freedom for optimization. A list of tuples
-        like: (unit_type, actuator, index), e.g. ('sgen', 'p_mv', 1).
+        like: (unit_type, actuator, index), e.g. ('sgen', 'p_mv', 1). The
+        index can also be an array of indices or 'all', e.g.
+        ('sgen', 'q_mvar', 'all'). Possible actuators: p_mw/q_mvar of
+        gen, sgen, load and storage, vm_pu of gen and ext_grid, tap_pos of
+        trafo and trafo3w and step of shunt (see "variables.py").
 
         net: A pandapower net object with defined constraints.
 
@@ -47,6 +81,9 @@ class GeneticAlgorithm(genetic_operators.Mixin):
         obj_fct: A user- or pre-defined objective function to minimize. Use
         your own function here or use string of pre-defined function name.
         See "obj_functs.py" for pre-implemented functions like 'min_p_loss'.
+        A list of objective functions starts the multi-objective mode
+        (NSGA-II, see "nsga2.py"): The penalty gets added to every
+        objective and 'run' returns the Pareto front instead.
 
         constraints: A tuple of system constraints to consider. Options are:
         ('voltage_band', 'line_load', 'trafo_load', 'trafo3w_load',
@@ -69,44 +106,131 @@ class GeneticAlgorithm(genetic_operators.Mixin):
         'cmp_last': Compare best solution to best solutions n steps before.
         Terminate if only marginal improvement.
         For both, 10^-3 is the boundary for termination.
+        Alternatively, a criterion object or a tuple of them (terminate if
+        any is fulfilled) from "termination.py", e.g.
+        Stall(rel_tol=1e-4) | Deadline(seconds=2). Time and evaluation
+        budgets are checked within generations, too, so that the best
+        individual found so far is returned in time.
+
+        repair: If True -> Genes get projected onto the feasible region of
+        constraints that are known without power flow (e.g. max apparent
+        power) before evaluation. Individuals with failed power flow get
+        replaced by new ones, so that the population size stays constant.
+
+        skip_infeasible: If True -> No power flow is calculated for
+        individuals whose penalty of pre-PF constraints (see
+        "penalty_fcts.py") alone already exceeds the best fitness found so
+        far. Their fitness is set to that penalty. Use only with
+        non-negative objective functions!
+
+        pf_backend: Power flow backend to use. String of a registered
+        backend (see "pf_backends.py"), e.g. 'pp_nr' (pandapower
+        Newton-Raphson, default), 'pp_fdbx' (fast-decoupled), or
+        'lightsim2grid' (if installed), or a backend object.
+
+        pf_options: Dictionary of power flow options that overwrite the
+        defaults of the backend, e.g. {'enforce_q_lims': False,
+        'tolerance_mva': 1e-6}.
+
+        history: Path of a folder to record the complete optimization
+        history (genes, fitness, penalty, validity of every individual in
+        every generation) to. If True, the results folder is used (requires
+        save=True). See "history.py" for reading histories.
+
+        archive: Persistent archive of elite solutions of earlier runs (see
+        "archive.py"); a SolutionArchive object or path of its file. The
+        best solutions of every run get added to the archive.
+
+        warm_start: Share of the initial population that gets seeded from
+        the archive with the solutions of the most similar operating
+        conditions on the same grid and variable set.
+
+        init_sampling: How to sample the initial population: 'random'
+        (every gene independently, default), 'lhs' (Latin hypercube), or
+        'sobol' (scrambled Sobol sequence, requires scipy>=1.7). The latter
+        two cover the search space more evenly. See "sampling.py".
+
+        memetic: Dictionary to activate local refinement of the best
+        individuals by pattern search (see "memetic.py"), e.g.
+        {'every': 5, 'top_k': 2, 'budget': 20}: Every 5 generations, refine
+        the continuous genes of the 2 best individuals with up to 20 power
+        flows each. See 'memetic_report()' for costs and benefits.
+
+        adaptive: If True -> Mutation rate and probabilities of the
+        mutation operators get adjusted during the run, based on the
+        success of mutated children (see "adaptation.py"). The course of
+        the adaptation can be found in 'adaptation_stats'.
+
+        contingency: A ContingencyScreen object (see "contingency.py") to
+        consider N-1 security: Critical outages are found by linear
+        screening and checked with AC power flows. Their violations are
+        added to the penalty. Not together with 'evaluator' (add it to the
+        settings of the evaluator instead).
+
+        evaluator: Object that evaluates whole gene matrices instead of this
+        process, e.g. a ServiceEvaluator that uses a long-running
+        evaluation service with prepared nets (see "evaluation.py") or a
+        SharedMemoryEvaluator with local worker processes (see
+        "parallel.py"). The settings of the evaluation (objective,
+        constraints, power flow) are defined by the evaluator then.
 
         plot: If True -> Course of best results gets plotted in the end.
         (Warning: stops running of the code! Set save=True to prevent that)
 
         save: If True -> Save results and logger to newly created folder.
-        Plot into that folder, too.
+        Plot into that folder, too. Plots and a summary report are rendered
+        in a background thread (see "reporting.py"), so that the
+        optimization never waits for them. Use 'reporter.join()' to wait.
 
-        """
+        live_plot: Interval in seconds between updates of a live progress
+        plot in the results folder (requires save=True).
 
-        assert (len(variables) >= 1), 'Error: No degrees of Freedom!'
+        """
 
         self.pop_size = pop_size
-        self.vars = variables
         self.mutation_rate = mutation_rate
         self.constraints = constraints
-        self.termination_crit = termination
+        self.termination_crit = create_criterion(termination)
 
         # Pandapower network which state shall be optimized (Make sure that
         # original net does not get altered! -> deepcopy)
         self.net = deepcopy(net)
+        self.set_defaults()
 
+        # Expand bulk variables and extract their boundaries once
+        self.vars = VariableSet(self.net, variables)
+        assert (len(self.vars) >= 1), 'Error: No degrees of Freedom!'
         self.assert_unit_state('controllable')
         self.assert_unit_state('in_service')
-        self.set_defaults()
 
         # Choose objective function (attention: all objective
         # functions must be written as minimization!)
-        if isinstance(obj_fct, str):
-            # Select from pre-defined objective functions (e.g. reduce loss)
-            from . import obj_functs
-            self.obj_fct = getattr(obj_functs, obj_fct)
+        self.multi_objective = isinstance(obj_fct, (list, tuple))
+        if self.multi_objective:
+            self.obj_fcts = [self.get_obj_fct(fct) for fct in obj_fct]
+            self.obj_fct = self.obj_fcts[0]
+            if selection == 'tournament':
+                selection = 'crowded_tournament'
         else:
-            # Self-made objective function
-            self.obj_fct = obj_fct
+            self.obj_fct = self.get_obj_fct(obj_fct)
 
         self.sel_operator = selection
         self.cross_operator = crossover
-        self.mut_operators = mutation
+        # Copy, because adaptation alters the probabilities (and keep the
+        # initial values to restore them for every run)
+        self.mut_operators = dict(mutation)
+        self.initial_mutation = (mutation_rate, dict(mutation))
+
+        self.repair_genes = repair
+        self.skip_infeasible = skip_infeasible
+        self.s_limits = self.apparent_power_limits()
+
+        self.pf_backend = get_backend(pf_backend, pf_options)
+        if evaluator is not None:
+            # The contingency screen belongs into the evaluator's settings
+            assert contingency is None, 'Add contingency to the evaluator!'
+        self.contingency = contingency
+        self.evaluator = evaluator
 
         self.total_best_fit_course = []
         self.best_fit_course = []
@@ -114,12 +238,49 @@ class GeneticAlgorithm(genetic_operators.Mixin):
 
         self.plot = plot
         self.save = save
+        self.live_plot = live_plot
+        self.reporter = None
+
+        self.cancelled = False
+        self._opt_net = None
 
         if save is True:
             self.path = util.create_path()
         else:
             self.path = None
 
+        if history is True:
+            assert save is True, 'Set save=True or give path of history!'
+            history = f'{self.path}history/'
+        self.history_path = history or None
+        self.recorder = None
+
+        if isinstance(archive, str):
+            archive = SolutionArchive(archive)
+        self.archive = archive
+        self.warm_start = warm_start
+        self.init_sampling = init_sampling
+
+        if memetic is not None:
+            assert not self.multi_objective, 'Memetic mode: one objective!'
+        self.memetic = memetic
+        self.adaptive = adaptive
+        self.adaptation_stats = []
+        if archive is not None:
+            self.net_key = fingerprint(self.net, self.vars)
+            self.conditions = operating_conditions(self.net)
+
+    @staticmethod
+    def get_obj_fct(obj_fct):
+        """ Return objective function from its name or the function
+        itself. """
+        if isinstance(obj_fct, str):
+            # Select from pre-defined objective functions (e.g. reduce loss)
+            from . import obj_functs
+            return getattr(obj_functs, obj_fct)
+        # Self-made objective function
+        return obj_fct
+
     def assert_unit_state(self, status: str='controllable'):
         """ Assert that units to be optimized are usable beforehand by
         checking 'in_service' or 'controllable' of each actuator. If they
@@ -136,14 +297,12 @@ class GeneticAlgorithm(genetic_operators.Mixin):
         # TODO: Do only, if voltage band is constraint
         if 'min_vm_pu' not in self.net.bus:
             u_min = 0.9
-            self.net.bus['min_vm_pu'] = pd.Series(
-                [u_min for _ in self.net.bus.index], index=self.net.bus.index)
+            self.net.bus['min_vm_pu'] = u_min
             print(f'Set "min_vm_pu" to default ({u_min} pu) for all buses')
 
         if 'max_vm_pu' not in self.net.bus:
             u_max = 1.1
-            self.net.bus['max_vm_pu'] = pd.Series(
-                [u_max for _ in self.net.bus.index], index=self.net.bus.index)
+            self.net.bus['max_vm_pu'] = u_max
             print(f'Set "max_vm_pu" to default ({u_max} pu) for all buses')
 
         # TODO: Do only, if loading is constraint
@@ -152,67 +311,236 @@ class GeneticAlgorithm(genetic_operators.Mixin):
                 continue
             if 'max_loading_percent' not in self.net[unit]:
                 max_loading = 100
-                self.net[unit]['max_loading_percent'] = pd.Series(
-                    [max_loading for _ in self.net[unit].index],
-                    index=self.net[unit].index)
+                self.net[unit]['max_loading_percent'] = max_loading
                 print(f'Set "max_loading_percent" to default ({max_loading}%) for all "{unit}"')
 
     def run(self, iter_max: int=None):
         """ Run genetic algorithm until termination. Return optimized
-        pandapower network and the value of the respective objective fct. """
-
-        self.init_pop()
+        pandapower network and the value of the respective objective fct.
+        If 'iter_max' is None, only the termination criterion ends the run.
+        In multi-objective mode, return the Pareto front (tuple of
+        individuals) and its matrix of objective values instead. """
 
-        for n_iter in range(iter_max):
-            self.n_iter = n_iter
-            print(f'Step {n_iter}')  # TODO: proper logging instead!
-            self.fit_fct()
-            if getattr(self, self.termination_crit)() is True:
-                break
-            self.selection(sel_operator=self.sel_operator)
-            self.recombination(cross_operator=self.cross_operator)
-            self.mutation(self.mutation_rate,
-                          mut_operators=self.mut_operators)
+        for _ in self.iter_run(iter_max):
+            pass
 
         if self.best_ind.valid is False:
             # TODO: Raise error here like pandapower does?
             print(f'Attention: Solution does not fulfill all constraints!')
 
-        self.opt_net, _ = self.update_net(self.net, self.best_ind)
         self.create_result()
         if self.save is True:
             util.save_net(best_net=self.opt_net, path=self.path)
 
-        if self.plot is True:
+        if self.plot is True and self.save is False:
+            # Interactive plot (with save=True, the reporter plots)
             util.plot_fit_courses(self.save, self.path,
                 self.best_fit_course, self.total_best_fit_course)
 
+        if self.multi_objective:
+            return self.pareto_front, self.pareto_objectives()
         return self.opt_net, self.best_ind.fitness
 
+    def iter_run(self, iter_max: int=None):
+        """ Run genetic algorithm as generator: Yield a snapshot of the
+        best solution found so far after every generation, so that a usable
+        result is available at any time. Stop iterating (or call 'close()'
+        of the generator) to end the optimization. 'cancel()' can be called
+        from another thread to stop even within a generation. The optimized
+        net is only built on access of 'opt_net'.
+
+        Attention: The generator must be closed (or exhausted) in the end.
+        Otherwise, the history does not get merged, the archive does not
+        get written and the pool of outage checks stays alive. """
+
+        assert iter_max is None or iter_max >= 1, 'Error: iter_max < 1!'
+        self.n_evals = 0
+        self.cancelled = False
+        self.termination_crit.reset(self)
+        self.survivors = ()
+        self.reference_fitness = None
+        self.mutation_rate = self.initial_mutation[0]
+        self.mut_operators = dict(self.initial_mutation[1])
+        self.adaptation_stats = []
+        self.total_best_fit_course = []
+        self.best_fit_course = []
+        self.avrg_fit_course = []
+        self.memetic_stats = {'n_calls': 0, 'n_evals': 0, 'n_improved': 0,
+                              'improvement': 0.0}
+        self.recorder = None
+        self.reporter = None
+        initialized = False
+        start_time = time.time()
+
+        try:
+            # Within 'try', so that reporter and recorder get finalized even
+            # if the initialization fails
+            if self.history_path is not None:
+                self.recorder = HistoryRecorder(self.history_path, self.vars)
+            if self.save is True:
+                self.reporter = Reporter(self.path, self.live_plot)
+            self.init_pop()
+            initialized = True
+
+            for n_iter in (range(iter_max) if iter_max is not None
+                           else itertools.count()):
+                self.n_iter = n_iter
+                print(f'Step {n_iter}')  # TODO: proper logging instead!
+                if n_iter > 0:
+                    # Create next generation (not after the last step, so
+                    # that the final population is always evaluated)
+                    self.selection(sel_operator=self.sel_operator)
+                    self.recombination(cross_operator=self.cross_operator)
+                    self.mutation(self.mutation_rate,
+                                  mut_operators=self.mut_operators)
+                    if self.repair_genes is True:
+                        self.repair()
+                self.fit_fct()
+                if self.adaptive is True and len(self.pop) > 0:
+                    self.adapt_mutation()
+                if self.multi_objective:
+                    self.environmental_selection()
+                if (self.memetic is not None and n_iter > 0
+                        and n_iter % self.memetic.get('every', 5) == 0):
+                    self.memetic_step(
+                        **{key: value for key, value in self.memetic.items()
+                           if key != 'every'})
+                yield Snapshot(
+                    n_iter=n_iter,
+                    genes=tuple(float(gene.value) for gene in self.best_ind),
+                    fitness=self.best_ind.fitness,
+                    valid=self.best_ind.valid,
+                    n_evals=self.n_evals)
+                if self.reporter is not None:
+                    self.reporter.update(self.fit_courses())
+                if self.cancelled or self.termination_crit(self) is True:
+                    break
+        finally:
+            # Also if the generator gets closed early
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.contingency is not None:
+                # Stop outstanding parallel outage checks
+                self.contingency.close()
+            if self.archive is not None and initialized:
+                self.archive_elites()
+            if self.reporter is not None:
+                summary = (self.summary(time.time() - start_time)
+                           if initialized else {})
+                self.reporter.finalize(self.fit_courses(), summary,
+                                       self.history_path, plot=self.plot)
+
+    def archive_elites(self, n_elites: int=5):
+        """ Add the best valid solutions of the run to the archive. """
+        candidates = sorted(tuple(self.pop) + (self.best_ind, ),
+                            key=lambda ind: ind.fitness
+                            if ind.fitness is not None else np.inf)
+        elites = []
+        for ind in candidates:
+            if ind.valid is not True or ind.failure:
+                continue
+            if any(np.array_equal(ind.genes, elite.genes) for elite in elites):
+                continue
+            elites.append(ind)
+            if len(elites) >= n_elites:
+                break
+
+        self.archive.add(self.net_key, self.conditions,
+                         [ind.genes for ind in elites],
+                         [ind.fitness for ind in elites])
+        self.archive.save()
+
+    def fit_courses(self):
+        """ Fitness courses to plot with their labels. """
+        return {'Best costs': self.best_fit_course,
+                'Total best costs': self.total_best_fit_course}
+
+    def summary(self, duration: float):
+        """ Summary of the run for reporting. """
+        return {'best_fitness': self.best_ind.fitness,
+                'valid': bool(self.best_ind.valid),
+                'n_iter': self.n_iter + 1,
+                'n_evals': self.n_evals,
+                'duration_s': duration,
+                'best_genes': [[*var, float(gene.value)]
+                               for var, gene in zip(self.vars, self.best_ind)]}
+
+    def cancel(self):
+        """ Stop the running optimization after the current evaluation
+        (thread-safe). The best individual found so far is kept. """
+        self.cancelled = True
+        if self.contingency is not None:
+            # Cancel pending outage checks
+            self.contingency.close()
+        if hasattr(self.evaluator, 'cancel'):
+            # Stop outstanding parallel evaluations
+            self.evaluator.cancel()
+
+    @property
+    def opt_net(self):
+        """ Pandapower network in the state of the best individual found
+        so far. Gets built (one power flow) only on first access. """
+        if self._opt_net is None or self._opt_net[0] is not self.best_ind:
+            net, _ = self.update_net(deepcopy(self.net), self.best_ind)
+            self._opt_net = (self.best_ind, net)
+        return self._opt_net[1]
+
     def init_pop(self):
-        """ Random initilization of the population. """
-        self.pop = [Individual(self.vars, self.net)
-                    for _ in range(self.pop_size)]
+        """ Random initilization of the population. Optionally, a share of
+        the population is seeded from the archive of earlier runs. """
+        if self.init_sampling != 'random':
+            # Individuals directly from the samples (no random init first)
+            samples = sample_genes(
+                self.init_sampling, self.pop_size,
+                min_values=self.vars.min_values,
+                max_values=self.vars.max_values,
+                is_int=self.vars.is_int)
+            self.pop = [Individual(self.vars, self.net, values=sample)
+                        for sample in samples.tolist()]
+        else:
+            self.pop = [Individual(self.vars, self.net)
+                        for _ in range(self.pop_size)]
+
+        if self.archive is not None and self.warm_start > 0:
+            seeds = self.archive.nearest(
+                self.net_key, self.conditions,
+                round(self.warm_start * self.pop_size))
+            for ind, genes in zip(self.pop, seeds):
+                ind.set_genes(genes)
+            print(f'Seeded {len(seeds)} individuals from archive')
+
+        if self.repair_genes is True:
+            self.repair()
         self.best_ind = self.pop[0]
         self.best_ind.fitness = 1e9
 
     def fit_fct(self):
         """ Calculate fitness for each individual, including penalties for
         constraint violations which gets added to the objective function. """
-        for ind in self.pop:
-            net, ind.failure = self.update_net(self.net, ind)
-
-            if ind.failure is True:
-                continue
+        if self.evaluator is not None:
+            # Delegate evaluation of the whole population
+            self.evaluate_batch(self.pop)
+        else:
+            # Penalties that are known without power flow (vectorized)
+            pre_penalties = pre_pf_penalties(
+                self.net, self.constraints, self.vars,
+                [ind.genes for ind in self.pop])
+            for ind, pre_penalty in zip(self.pop, pre_penalties):
+                self.evaluate(ind, pre_penalty)
 
-            # Check if constraints are violated and calculate penalty
-            ind.penalty, ind.valid = penalty_fct(net, self.constraints)
+        if self.repair_genes is True:
+            self.pop = list(self.pop)
+            self.refill()
 
-            # Assign fitness value to each individual
-            ind.fitness = self.obj_fct(net=net) + ind.penalty
+        if self.recorder is not None:
+            self.recorder.record(self.n_iter, self.pop)
 
         # Delete individuals with failed power flow (not evaluatable)
         self.pop = tuple(filter(lambda ind: not ind.failure, self.pop))
+        if len(self.pop) == 0:
+            # Nothing evaluated in this step (e.g. budget exhausted)
+            self.total_best_fit_course.append(self.best_ind.fitness)
+            return
 
         # Evaluation of fitness values
         best_ind = min(self.pop, key=lambda ind: ind.fitness)
@@ -225,6 +553,87 @@ class GeneticAlgorithm(genetic_operators.Mixin):
             [ind.fitness for ind in self.pop]) / len(self.pop)
         self.avrg_fit_course.append(average_fitness)
 
+    def evaluate(self, ind, pre_penalty: float=None):
+        """ Calculate fitness of a single individual. The penalty of the
+        pre-PF constraints can be given if already known. """
+        if self.stop_evaluation():
+            # Individuals left are not evaluatable
+            ind.failure = True
+            return
+
+        if self.evaluator is not None:
+            self.evaluate_batch([ind])
+            return
+
+        if pre_penalty is None:
+            pre_penalty = pre_pf_penalties(
+                self.net, self.constraints, self.vars, [ind.genes])[0]
+
+        if self.skip_infeasible and pre_penalty > self.best_ind.fitness:
+            # Hopeless candidate: Power flow not necessary
+            ind.penalty, ind.valid = pre_penalty, False
+            ind.fitness = pre_penalty
+            if self.multi_objective:
+                ind.objectives = np.full(len(self.obj_fcts), pre_penalty)
+            return
+
+        net, ind.failure = self.update_net(self.net, ind)
+        self.n_evals += 1
+
+        if ind.failure is True:
+            return
+
+        # Objective function(s) of the base case
+        if self.multi_objective:
+            objectives = np.array(
+                [obj_fct(net=net) for obj_fct in self.obj_fcts])
+        else:
+            objective = self.obj_fct(net=net)
+
+        # Check if constraints are violated and calculate penalty
+        post_penalty, _ = penalty_fct(net, self.constraints, stage='post')
+        ind.penalty = pre_penalty + post_penalty
+        if self.contingency is not None:
+            # Security constraints (N-1)
+            ind.penalty += self.contingency(
+                net, self.pf_backend, getattr(self, 'n_iter', 0),
+                setpoints=tuple(zip(self.vars, (var.value for var in ind))))
+        ind.valid = not ind.penalty > 0
+
+        # Assign fitness value to each individual
+        if self.multi_objective:
+            ind.objectives = objectives + ind.penalty
+            # Scalar fitness only for tracking of progress and termination
+            ind.fitness = float(sum(ind.objectives))
+        else:
+            ind.fitness = objective + ind.penalty
+
+    def evaluate_batch(self, pop):
+        """ Evaluate a whole population at once with the external
+        evaluator (e.g. an evaluation service, see "evaluation.py"). """
+        if self.stop_evaluation():
+            for ind in pop:
+                ind.failure = True
+            return
+
+        results = self.evaluator.evaluate(
+            np.array([ind.genes for ind in pop]).reshape(len(pop), -1))
+        self.n_evals += len(pop)
+        if self.multi_objective:
+            assert 'objectives' in results, 'Evaluator: Single objective!'
+        for idx, ind in enumerate(pop):
+            ind.failure = bool(results['failure'][idx])
+            ind.valid = bool(results['valid'][idx])
+            ind.penalty = results['penalty'][idx]
+            ind.fitness = results['fitness'][idx]
+            if self.multi_objective:
+                ind.objectives = results['objectives'][idx]
+
+    def stop_evaluation(self):
+        """ Check if run got cancelled or time/evaluation budget is used
+        up. """
+        return self.cancelled or self.termination_crit.exhausted(self)
+
     def cmp_last(self):
         """ Termination criterion: Check if best solution still changes.
         Idea check not last x=const iterations, but consider an increasing
@@ -260,12 +669,12 @@ class GeneticAlgorithm(genetic_operators.Mixin):
 
         # Update the actuators to be optimized
         for (unit_type, actuator, idx), nmbr in zip(self.vars, ind):
-            net[unit_type][actuator][idx] = nmbr.value
+            net[unit_type].at[idx, actuator] = nmbr.value
 
         # Update the power flow results by performing pf-calculation
         failure = False
         try:
-            pp.runpp(net, enforce_q_lims=True)
+            self.pf_backend.run(net)
         except KeyboardInterrupt:
             print('Optimization interrupted by user!')
             sys.exit()
@@ -0,0 +1,129 @@
+# reporting.py
+"""
+Non-blocking reporting for the pandapower ga-OPF: Convergence plots and
+summary reports are rendered in a background thread, so that the
+optimization never waits on rendering or file I/O.
+
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .history import HistoryReader
+
+
+class Reporter:
+    def __init__(self, path: str, live_interval: float=None,
+                 format_type: str='png'):
+        """ path: Folder to write plots and reports to.
+
+        live_interval: Minimal time in seconds between two updates of the
+        live progress plot. If None, no live plot is created.
+
+        format_type: File format of the plots. """
+        self.path = path
+        self.live_interval = live_interval
+        self.format_type = format_type
+        self.last_update = 0
+
+        self.jobs = queue.Queue()
+        # Daemon, so that an unfinished run (e.g. a generator that never
+        # gets closed) does not block the exit. Pending reports get
+        # finished at exit anyway.
+        self.thread = threading.Thread(target=self.work, name='Reporter',
+                                       daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def update(self, courses: dict):
+        """ Request a new live progress plot of the fitness courses
+        ({label: list of values}). Returns immediately; updates within the
+        live interval are ignored (throttling). """
+        if self.live_interval is None:
+            return
+        now = time.time()
+        if now - self.last_update < self.live_interval:
+            return
+        self.last_update = now
+        # Copy, because the optimization continues to append
+        courses = {label: list(course) for label, course in courses.items()}
+        self.jobs.put(('live', courses))
+
+    def finalize(self, courses: dict, summary: dict, history_path=None,
+                 plot: bool=True):
+        """ Request the final convergence plot (from the recorded history if
+        available) and the summary report. Returns immediately. """
+        courses = {label: list(course) for label, course in courses.items()}
+        self.jobs.put(('final', (courses, summary, history_path, plot)))
+        self.jobs.put(None)
+
+    def join(self, timeout: float=None):
+        """ Wait until all requested reports are written. """
+        self.thread.join(timeout)
+
+    def close(self):
+        """ Finish pending reports and stop the thread (called at exit). """
+        self.jobs.put(None)
+        self.join()
+
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                atexit.unregister(self.close)
+                return
+            kind, data = job
+            # Skip outdated live plots if newer jobs are waiting already
+            if kind == 'live' and not self.jobs.empty():
+                continue
+            try:
+                if kind == 'live':
+                    self.render(data, 'live_progress')
+                else:
+                    self.report(*data)
+            except Exception as error:
+                # Reporting must never crash the optimization
+                print(f'Reporting failed: {error}')
+
+    def report(self, courses, summary, history_path, plot):
+        if history_path is not None:
+            history = HistoryReader(history_path)
+            courses['Best costs'] = history.best_fit_course()
+            summary['valid_share_course'] = valid_share_course(history)
+        if plot:
+            self.render(courses, 'optimization_course')
+
+        with open(f'{self.path}summary.json', 'w') as file:
+            json.dump(summary, file, indent=2, default=float)
+
+    def render(self, courses, filename):
+        """ Render fitness courses with the object-oriented matplotlib
+        interface (thread-safe, no GUI) and save them. """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        for label, course in courses.items():
+            if len(course):
+                ax.plot(course, label=label)
+        ax.legend(loc='upper right')
+        ax.set_ylabel('Total costs')
+        ax.set_xlabel('Iteration number')
+        fig.savefig(f'{self.path}{filename}.{self.format_type}',
+                    format=self.format_type, bbox_inches='tight')
+
+
+def valid_share_course(history):
+    """ Share of valid individuals in every generation of a history. """
+    generation = history['generation']
+    n_valid = np.bincount(generation, weights=history['valid'],
+                          minlength=history.n_generations)
+    n_inds = np.bincount(generation, minlength=history.n_generations)
+    return list(n_valid / np.maximum(n_inds, 1))
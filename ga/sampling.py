@@ -0,0 +1,54 @@
+# sampling.py
+"""
+Space-filling sampling of initial populations for the pandapower ga-OPF.
+All samplers return a matrix of samples in the unit hypercube [0, 1) with
+one row per individual, which gets scaled to the bounds of the variables.
+
+"""
+
+import math
+
+import numpy as np
+
+
+def latin_hypercube(n_samples: int, n_dims: int):
+    """ Latin hypercube sampling: Every dimension is divided into
+    'n_samples' strata and every stratum gets exactly one sample. """
+    strata = np.argsort(np.random.rand(n_samples, n_dims), axis=0)
+    return (strata + np.random.rand(n_samples, n_dims)) / n_samples
+
+
+def sobol(n_samples: int, n_dims: int):
+    """ Scrambled Sobol sequence (low-discrepancy). Requires scipy>=1.7. """
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError('Sobol sampling requires scipy>=1.7')
+    sampler = qmc.Sobol(n_dims, scramble=True,
+                        seed=np.random.randint(2**31))
+    # Draw a power of two to keep the balance properties of the sequence
+    exponent = math.ceil(math.log2(max(n_samples, 1)))
+    return sampler.random_base2(exponent)[:n_samples]
+
+
+SAMPLERS = {'lhs': latin_hypercube, 'sobol': sobol}
+
+
+def sample_genes(sampling: str, n_samples: int, min_values, max_values,
+                 is_int):
+    """ Sample a gene matrix within the given bounds. Integer genes get
+    all integer values between the bounds with equal probability. """
+    if sampling not in SAMPLERS:
+        raise ValueError(f'Sampling method "{sampling}" not implemented')
+
+    min_values = np.asarray(min_values, dtype=float)
+    max_values = np.asarray(max_values, dtype=float)
+    is_int = np.asarray(is_int, dtype=bool)
+
+    unit_samples = SAMPLERS[sampling](n_samples, len(min_values))
+    # Integers: one more value, because upper bound is included
+    ranges = max_values - min_values + is_int
+    genes = min_values + unit_samples * ranges
+    genes[:, is_int] = np.minimum(np.floor(genes[:, is_int]),
+                                  max_values[is_int])
+    return genes
@@ -0,0 +1,180 @@
+# termination.py
+"""
+A collection of composable termination criteria for the pandapower ga-OPF.
+
+Every criterion is called with the running GeneticAlgorithm after each
+evaluated generation and returns True if the optimization should stop.
+Criteria can be combined with `|` (stop if any is fulfilled) and `&` (stop
+only if all are fulfilled), e.g.:
+    Stall(rel_tol=1e-4) | Deadline(seconds=2) | MaxEvaluations(5000)
+
+"""
+
+import time
+
+import numpy as np
+
+
+class Criterion:
+    """ Base class of all termination criteria. """
+    # Hard budgets (time, evaluations) are also checked within a generation
+    # so that a run does not overshoot its budget by a whole generation.
+    hard = False
+
+    def reset(self, ga):
+        """ Called once at the start of every run. """
+        pass
+
+    def __call__(self, ga):
+        raise NotImplementedError
+
+    def exhausted(self, ga):
+        """ Check only the hard budgets (see 'hard'). """
+        return self.hard and bool(self(ga))
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+
+class AnyOf(Criterion):
+    """ Terminate if at least one of the criteria is fulfilled. """
+    def __init__(self, *criteria):
+        self.criteria = tuple(create_criterion(crit) for crit in criteria)
+
+    def reset(self, ga):
+        for crit in self.criteria:
+            crit.reset(ga)
+
+    def __call__(self, ga):
+        # Evaluate all criteria so that every one of them can print/log
+        return any([bool(crit(ga)) for crit in self.criteria])
+
+    def exhausted(self, ga):
+        return any(crit.exhausted(ga) for crit in self.criteria)
+
+
+class AllOf(AnyOf):
+    """ Terminate only if all of the criteria are fulfilled. """
+    def __call__(self, ga):
+        return all([bool(crit(ga)) for crit in self.criteria])
+
+    def exhausted(self, ga):
+        return all(crit.exhausted(ga) for crit in self.criteria)
+
+
+class Method(Criterion):
+    """ Wrapper for the old-style criteria that are implemented as methods
+    of the GeneticAlgorithm (e.g. 'cmp_last'). """
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, ga):
+        return getattr(ga, self.name)() is True
+
+
+class Stall(Criterion):
+    """ Terminate if the total best fitness did not improve by more than
+    'rel_tol' (relative) within the last 'window' generations. If no fixed
+    window is given, it grows with the run: window_share * n_iter +
+    min_window (compare 'cmp_last'). The improvement is related to the
+    absolute value of the fitness, so that negative fitness values work,
+    too. """
+    def __init__(self, rel_tol: float=1e-3, window: int=None,
+                 window_share: float=0.2, min_window: int=5):
+        self.rel_tol = rel_tol
+        self.window = window
+        self.window_share = window_share
+        self.min_window = min_window
+
+    def __call__(self, ga):
+        course = ga.total_best_fit_course
+        if self.window is not None:
+            window = self.window
+        else:
+            window = round(len(course) * self.window_share) + self.min_window
+        if len(course) <= window:
+            return False
+
+        improvement = course[-window - 1] - course[-1]
+        reference = abs(course[-window - 1])
+        if reference == 0:
+            return improvement <= 0
+        return improvement / reference < self.rel_tol
+
+
+class DiversityCollapse(Criterion):
+    """ Terminate if the population has converged to (almost) a single
+    point. Diversity is the average standard deviation of all genes,
+    normalized to the respective range of the gene. """
+    def __init__(self, min_diversity: float=1e-3):
+        self.min_diversity = min_diversity
+
+    def __call__(self, ga):
+        return diversity(ga.pop) < self.min_diversity
+
+
+class MaxEvaluations(Criterion):
+    """ Terminate after a given number of fitness evaluations (power flow
+    calculations). """
+    hard = True
+
+    def __init__(self, n_evals: int):
+        self.n_evals = n_evals
+
+    def __call__(self, ga):
+        return ga.n_evals >= self.n_evals
+
+
+class Deadline(Criterion):
+    """ Terminate after a given wall-clock time in seconds since the start
+    of the run. The best individual found until then is the result. """
+    hard = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def reset(self, ga):
+        self.start = time.time()
+
+    def __call__(self, ga):
+        return time.time() - self.start >= self.seconds
+
+
+class TargetFitness(Criterion):
+    """ Terminate as soon as a valid solution with a fitness of 'target' or
+    better (lower) is found. """
+    def __init__(self, target: float, only_valid: bool=True):
+        self.target = target
+        self.only_valid = only_valid
+
+    def __call__(self, ga):
+        if self.only_valid and ga.best_ind.valid is not True:
+            return False
+        return ga.best_ind.fitness <= self.target
+
+
+def diversity(pop):
+    """ Average normalized standard deviation of the genes of a
+    population. """
+    if len(pop) < 2:
+        return 0.0
+    values = np.array([[gene.value for gene in ind] for ind in pop],
+                      dtype=float)
+    ranges = np.array([gene.range for gene in pop[0]], dtype=float)
+    return float(np.mean(values.std(axis=0) / ranges))
+
+
+def create_criterion(termination):
+    """ Create a criterion from a string (name of a GeneticAlgorithm
+    method like 'cmp_last'), a Criterion object, or a tuple/list of both
+    (terminate if any is fulfilled). """
+    if isinstance(termination, Criterion):
+        return termination
+    if isinstance(termination, str):
+        return Method(termination)
+    if isinstance(termination, (tuple, list)):
+        return AnyOf(*termination)
+    raise ValueError(f'Termination criterion "{termination}" not possible')
@@ -4,9 +4,6 @@
 import datetime
 import os
 
-import matplotlib.pyplot as plt
-import pandapower as pp
-
 
 def create_path():
     """ Create folder for data saving. The name of the folder is the
@@ -20,6 +17,7 @@ def create_path():
 
 def save_net(best_net, path: str, format_='pickle'):
     """ Save pandapower network to some format. """
+    import pandapower as pp
     filename = 'best_net'
     if format_ == 'pickle':
         pp.to_pickle(best_net, path+filename+'.p')
@@ -35,6 +33,8 @@ def plot_fit_courses(save: bool, path: str,
     """ Plot the total best fitness value, the best fitness value of the
     respective step as course over the iterations. (Also possible: Plot the
     average fitness. Problematic because of penalties) """
+    # Import only if required (slow import and not required for workers)
+    import matplotlib.pyplot as plt
 
     if best_fit_course:
         plt.plot(best_fit_course, label='Best costs')
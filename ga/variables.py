@@ -0,0 +1,99 @@
+# variables.py
+"""
+Compiled set of the degrees of freedom for the pandapower ga-OPF: Variables
+can be given in bulk, e.g. ('sgen', 'q_mvar', 'all') or with an array of
+indices instead of a single index. They get expanded to single
+(unit_type, actuator, idx) tuples and all boundaries and integer flags are
+extracted into arrays with one pandas access per unit type and actuator
+(instead of one per variable and new individual).
+
+"""
+
+import numpy as np
+
+
+class VariableSet:
+    def __init__(self, net, variables):
+        """ net: The pandapower net with boundaries of the actuators.
+
+        variables: Tuples of (unit_type, actuator, idx). 'idx' can be a
+        single index, an iterable of indices or 'all' (all units in service
+        that are 'controllable' if defined). """
+        self.vars = expand_variables(net, variables)
+
+        n_vars = len(self.vars)
+        self.min_values = np.zeros(n_vars)
+        self.max_values = np.zeros(n_vars)
+        self.is_int = np.zeros(n_vars, dtype=bool)
+        # Random initialization normally distributed? (Otherwise: equally)
+        self.is_normal = np.zeros(n_vars, dtype=bool)
+
+        groups = {}
+        for pos, (unit_type, actuator, _) in enumerate(self.vars):
+            groups.setdefault((unit_type, actuator), []).append(pos)
+        for (unit_type, actuator), positions in groups.items():
+            idx = [self.vars[pos][2] for pos in positions]
+            (self.min_values[positions], self.max_values[positions],
+             self.is_int[positions], self.is_normal[positions]) = boundaries(
+                 net, unit_type, actuator, idx)
+
+    def __iter__(self):
+        yield from self.vars
+
+    def __len__(self):
+        return len(self.vars)
+
+    def __getitem__(self, idx):
+        return self.vars[idx]
+
+    def __repr__(self):
+        return str(self.vars)
+
+
+def expand_variables(net, variables):
+    """ Expand bulk variables to a tuple of single variables. """
+    expanded = []
+    for unit_type, actuator, idx in variables:
+        if isinstance(idx, str) and idx == 'all':
+            idx = selectable_units(net, unit_type)
+        if np.ndim(idx) == 0:
+            idx = (idx, )
+        expanded.extend((unit_type, actuator, int(i)) for i in idx)
+    return tuple(expanded)
+
+
+def selectable_units(net, unit_type: str):
+    """ Indices of all units of a type that are in service and
+    controllable (if these columns are defined). """
+    units = net[unit_type]
+    mask = np.ones(len(units.index), dtype=bool)
+    for status in ('in_service', 'controllable'):
+        if status in units:
+            mask &= units[status].fillna(True).values.astype(bool)
+    return units.index[mask]
+
+
+def boundaries(net, unit_type: str, actuator: str, idx):
+    """ Min and max values, integer flag and distribution flag of multiple
+    units of the same type and actuator (vectorized). """
+    units = net[unit_type]
+    if actuator == 'vm_pu' and unit_type in ('gen', 'ext_grid'):
+        # AVR regulation: Voltage band of the connected bus
+        buses = units.bus.loc[idx].values
+        return (net.bus.min_vm_pu.loc[buses].values,
+                net.bus.max_vm_pu.loc[buses].values, False, True)
+    if unit_type in ('gen', 'sgen', 'load', 'storage'):
+        # Active or reactive power regulation
+        return (units[f'min_{actuator}'].loc[idx].values,
+                units[f'max_{actuator}'].loc[idx].values, False, False)
+    if actuator == 'tap_pos':
+        # Tap-changing transformer regulation
+        return (units.tap_min.loc[idx].values,
+                units.tap_max.loc[idx].values, True, True)
+    if actuator == 'step':
+        # Shunt regulation
+        return 0, units.max_step.loc[idx].values, True, False
+
+    raise ValueError(f"""
+        The combination {unit_type}, {actuator} is not possible
+        (Maybe not implemented yet)""")
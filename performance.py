@@ -5,10 +5,16 @@ Template to run performance tests to improve ga algorithm
 """
 
 import copy
+import subprocess
+import sys
 import time
 
+import numpy as np
+
 import examples
 from ga import pp_ga
+from ga.individual import Individual
+from ga.pf_backends import available_backends, get_backend
 
 
 def main():
@@ -31,7 +37,9 @@ def main():
         print()
 
 
-def scenario():
+def scenario(**settings):
+    """ GA on the cigre MV grid. 'settings' overwrite the default
+    settings of the GeneticAlgorithm (e.g. pop_size=50). """
     net = examples.create_net2()
 
     # Degrees of freedom for optimization
@@ -47,10 +55,10 @@ def scenario():
                  ('trafo', 'tap_pos', 0),
                  ('trafo', 'tap_pos', 1))
 
-    ga = pp_ga.GeneticAlgorithm(pop_size=100, variables=variables,
-                                net=net, mutation_rate=0.001,
-                                obj_fct='min_p_loss',
-                                constraints='all')
+    kwargs = dict(pop_size=100, mutation_rate=0.001,
+                  obj_fct='min_p_loss', constraints='all')
+    kwargs.update(settings)
+    ga = pp_ga.GeneticAlgorithm(variables=variables, net=net, **kwargs)
 
     return ga
 
@@ -73,5 +81,71 @@ def scenario3(ga):
     return ga
 
 
+def compare_backends(n_samples=100, reference='pp_nr',
+                     pf_options={'enforce_q_lims': True}):
+    """ Compare throughput of all available power flow backends and the
+    deviation of their results from the reference backend for the same
+    random individuals. All backends get the same 'pf_options', so that
+    the deviations only result from the solvers. """
+    ga = scenario()
+    inds = [Individual(ga.vars, ga.net) for _ in range(n_samples)]
+
+    results = {}
+    for name in available_backends():
+        ga.pf_backend = get_backend(name, pf_options)
+        # Warm-up (e.g. jit compilation) should not count
+        ga.update_net(ga.net, inds[0])
+        start = time.time()
+        voltages = []
+        losses = []
+        for ind in inds:
+            net, failure = ga.update_net(ga.net, ind)
+            voltages.append(net.res_bus.vm_pu.values.copy() if not failure
+                            else np.full(len(net.bus.index), np.nan))
+            losses.append(ga.obj_fct(net) if not failure else np.nan)
+        results[name] = (time.time() - start, np.array(voltages),
+                         np.array(losses))
+
+    _, ref_voltages, ref_losses = results[reference]
+    for name, (t, voltages, losses) in results.items():
+        print('Backend: ', name)
+        print('Power flows per second: ', n_samples / t)
+        print('Max voltage deviation (pu): ',
+              np.nanmax(np.abs(voltages - ref_voltages)))
+        print('Max objective deviation: ',
+              np.nanmax(np.abs(losses - ref_losses)))
+        print()
+
+
+def import_time(n_runs=5, max_seconds=1.0,
+                heavy_modules=('matplotlib', 'pandapower', 'pandas')):
+    """ Measure the import time of the ga package in fresh interpreters
+    (like in short-lived worker processes) compared to a bare interpreter.
+    Fail if heavy modules get imported eagerly or if the import takes
+    longer than 'max_seconds'. """
+    code = ('import sys; import ga.pp_ga; '
+            f'print(*[m for m in {heavy_modules} if m in sys.modules])')
+
+    def timed(cmd):
+        start = time.time()
+        output = subprocess.run([sys.executable, '-c', cmd], check=True,
+                                stdout=subprocess.PIPE).stdout
+        return time.time() - start, output.decode().strip()
+
+    baseline = min(timed('pass')[0] for _ in range(n_runs))
+    runs = [timed(code) for _ in range(n_runs)]
+    import_t = min(t for t, _ in runs) - baseline
+    eager_modules = runs[0][1]
+
+    print('Import time of ga.pp_ga: ', import_t)
+    assert not eager_modules, f'Imported eagerly: {eager_modules}'
+    assert import_t < max_seconds, 'Import time regression!'
+
+
 if __name__ == '__main__':
-    main()
+    if 'backends' in sys.argv[1:]:
+        compare_backends()
+    elif 'imports' in sys.argv[1:]:
+        import_time()
+    else:
+        main()
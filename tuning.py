@@ -0,0 +1,131 @@
+# tuning.py
+"""
+Parallel hyperparameter tuning of the genetic algorithm with successive
+halving: All configurations of the search space run a few seeded
+repetitions with a small iteration budget in a process pool. Only the best
+share of them advances to the next rung with a larger budget.
+
+Run 'python tuning.py' for the example scenario of "performance.py".
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import random
+import time
+
+import numpy as np
+
+import performance
+
+
+SEARCH_SPACE = {
+    'pop_size': (50, 100, 150),
+    'mutation_rate': (0.001, 0.01, 0.05),
+    'selection': ('tournament', ),
+    'crossover': ('single_point', ),
+    'mutation': ({'increase': 0.5, 'decrease': 0.5},
+                 {'random_init': 1.0},
+                 {'increase': 0.3, 'decrease': 0.3, 'random_init': 0.4})}
+
+
+def main():
+    result = tune(performance.scenario, SEARCH_SPACE)
+    print('Best configuration: ', result['config'])
+    print('Average costs: ', result['cost'])
+    print('Average time consumption: ', result['time'])
+
+
+def tune(scenario, search_space: dict, n_configs: int=None,
+         n_seeds: int=4, min_iter: int=5, max_iter: int=40, eta: int=3,
+         time_weight: float=0.5, n_workers: int=None):
+    """ Successive halving over the configurations of 'search_space'
+    (dictionary: setting -> tuple of options).
+
+    scenario: Picklable function that creates a GeneticAlgorithm from
+    keyword settings (like 'performance.scenario').
+
+    n_configs: Number of random configurations to sample. If None, the full
+    grid is used.
+
+    n_seeds: Seeded repetitions of each configuration per rung.
+
+    min_iter, max_iter: Iteration budget of the first and the last rung.
+    The budget grows by factor 'eta' per rung, while only the best 1/eta of
+    the configurations advance.
+
+    time_weight: Weight of the time consumption relative to the costs for
+    the promotion to the next rung and the final choice (both normalized
+    over the respective rung).
+
+    n_workers: Number of worker processes (default: number of cpus). """
+    keys = tuple(search_space)
+    configs = [dict(zip(keys, values))
+               for values in itertools.product(*search_space.values())]
+    if n_configs is not None and n_configs < len(configs):
+        configs = random.sample(configs, n_configs)
+
+    iter_max = min_iter
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=warm_up,
+                             initargs=(scenario, )) as executor:
+        while True:
+            print(f'Rung with {len(configs)} configurations and '
+                  f'{iter_max} iterations')
+            jobs = [(config, seed) for config in configs
+                    for seed in range(n_seeds)]
+            futures = [executor.submit(run_config, scenario, config, seed,
+                                       iter_max) for config, seed in jobs]
+            costs = np.zeros((len(configs), n_seeds))
+            times = np.zeros((len(configs), n_seeds))
+            for (config, seed), future in zip(jobs, futures):
+                idx = configs.index(config)
+                costs[idx, seed], times[idx, seed] = future.result()
+
+            mean_costs = costs.mean(axis=1)
+            mean_times = times.mean(axis=1)
+            # Same trade-off for promotion and final choice
+            score = normalize(mean_costs) + time_weight * normalize(mean_times)
+            n_keep = max(len(configs) // eta, 1)
+            if iter_max >= max_iter or len(configs) == 1:
+                break
+            best = np.argsort(score)[:n_keep]
+            configs = [configs[idx] for idx in best]
+            iter_max = min(iter_max * eta, max_iter)
+
+    best = int(np.argmin(score))
+    return {'config': configs[best], 'cost': mean_costs[best],
+            'time': mean_times[best],
+            'ranking': sorted(zip(score, mean_costs, mean_times, configs),
+                              key=lambda entry: entry[0])}
+
+
+def warm_up(scenario):
+    """ One power flow of the scenario net in every new worker process, so
+    that imports and jit compilation do not count as time consumption of
+    the first configuration of the worker. """
+    ga = scenario()
+    ga.pf_backend.run(ga.net)
+
+
+def run_config(scenario, config: dict, seed: int, iter_max: int):
+    """ Single seeded run of a configuration (in a worker process). Return
+    the costs and the time consumption. """
+    random.seed(seed)
+    np.random.seed(seed)
+    ga = scenario(**config)
+    start = time.time()
+    _, cost = ga.run(iter_max=iter_max)
+    return cost, time.time() - start
+
+
+def normalize(values):
+    """ Min-max normalization to [0, 1]. """
+    values = np.asarray(values, dtype=float)
+    span = values.max() - values.min()
+    if span == 0:
+        return np.zeros(len(values))
+    return (values - values.min()) / span
+
+
+if __name__ == '__main__':
+    main()